@@ -8,11 +8,39 @@ This module handles:
 - Address normalization
 """
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache, partial
+import math
+import multiprocessing
 import re
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
 from models import RawListingRecord, ConsolidatedProperty
 
 
+# Patterns used on every normalization call, compiled once at import
+_PUNCT_RE = re.compile(r'[^\w\s\-]')
+_STATE_ZIP_RE = re.compile(r'([A-Z]{2})\s*(\d{5}(?:-\d{4})?)?')
+_PRICE_CLEAN_RE = re.compile(r'[^\d.]')
+
+# Characters stripped from price strings; anything else falls back to _PRICE_CLEAN_RE
+_CURRENCY_STRIP = str.maketrans('', '', '$,€£ \u00a0')
+
+
+def _utc_timestamp(ts: datetime) -> datetime:
+    """Return ts as an aware UTC datetime, treating naive values as UTC.
+
+    Records loaded from older output files carry naive timestamps, and
+    comparing those with aware ones raises TypeError.
+    """
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
 class AddressNormalizer:
     """Normalize and standardize addresses for matching."""
     
@@ -44,44 +72,31 @@ class AddressNormalizer:
         'SW': 'SOUTHWEST'
     }
     
+    # Unit designations, all normalized to 'UNIT'
+    UNIT_DESIGNATORS = {
+        'APT': 'UNIT',
+        'SUITE': 'UNIT',
+        'STE': 'UNIT'
+    }
+    
+    # Single token -> replacement lookup covering all of the above
+    _TOKEN_MAP = {**STREET_SUFFIXES, **DIRECTIONALS, **UNIT_DESIGNATORS}
+    
     @staticmethod
     def normalize_address(address: str) -> str:
         """
         Normalize an address string for matching.
         
+        Results are memoized, so repeated lookups of the same address
+        during pairwise matching are free.
+        
         Args:
             address: Raw address string
             
         Returns:
             Normalized address string
         """
-        if not address:
-            return ""
-        
-        # Convert to uppercase
-        addr = address.upper().strip()
-        
-        # Remove extra whitespace
-        addr = re.sub(r'\s+', ' ', addr)
-        
-        # Remove punctuation except hyphens
-        addr = re.sub(r'[^\w\s\-]', '', addr)
-        
-        # Expand street suffixes
-        for abbr, full in AddressNormalizer.STREET_SUFFIXES.items():
-            addr = re.sub(rf'\b{abbr}\b', full, addr)
-        
-        # Expand directionals
-        for abbr, full in AddressNormalizer.DIRECTIONALS.items():
-            addr = re.sub(rf'\b{abbr}\b', full, addr)
-        
-        # Remove leading zeros from street numbers
-        addr = re.sub(r'\b0+(\d+)\b', r'\1', addr)
-        
-        # Normalize unit designations
-        addr = re.sub(r'\b(UNIT|APT|SUITE|STE|#)\s*', 'UNIT ', addr)
-        
-        return addr.strip()
+        return _normalize_address_cached(address)
     
     @staticmethod
     def extract_address_components(address: str) -> Dict[str, str]:
@@ -94,39 +109,342 @@ class AddressNormalizer:
         Returns:
             Dictionary with address components
         """
-        parts = [p.strip() for p in address.split(',')]
-        
-        components = {
-            'full_address': address,
-            'street': '',
-            'city': '',
-            'state': '',
-            'zip': ''
+        full_address, street, city, state, zip_code = _extract_address_components_cached(address)
+        return {
+            'full_address': full_address,
+            'street': street,
+            'city': city,
+            'state': state,
+            'zip': zip_code
         }
-        
-        if len(parts) >= 1:
-            components['street'] = parts[0]
-        if len(parts) >= 2:
-            components['city'] = parts[1]
-        if len(parts) >= 3:
-            # Try to extract state and ZIP
-            state_zip = parts[2].strip()
-            state_zip_match = re.match(r'([A-Z]{2})\s*(\d{5}(?:-\d{4})?)?', state_zip)
-            if state_zip_match:
-                components['state'] = state_zip_match.group(1)
-                if state_zip_match.group(2):
-                    components['zip'] = state_zip_match.group(2)
-        
-        return components
+
+
+@lru_cache(maxsize=8192)
+def _normalize_address_cached(address: str) -> str:
+    """Memoized implementation of AddressNormalizer.normalize_address."""
+    if not address:
+        return ""
+    
+    # Convert to uppercase
+    addr = address.upper()
+    
+    # Remove punctuation except hyphens
+    addr = _PUNCT_RE.sub('', addr)
+    
+    # Work token by token: splitting also collapses extra whitespace
+    token_map = AddressNormalizer._TOKEN_MAP
+    tokens = []
+    for token in addr.split():
+        if token.isdigit():
+            # Remove leading zeros from street numbers
+            token = token.lstrip('0') or '0'
+        else:
+            # Expand suffixes and directionals, normalize unit designations
+            token = token_map.get(token, token)
+        tokens.append(token)
+    
+    return ' '.join(tokens)
+
+
+@lru_cache(maxsize=8192)
+def _unit_designation(address: str) -> str:
+    """Unit number of a normalized address, or '' if it names none."""
+    tokens = address.split()
+    for pos in range(len(tokens) - 1):
+        if tokens[pos] == 'UNIT':
+            return tokens[pos + 1]
+    return ''
+
+
+@lru_cache(maxsize=8192)
+def _extract_address_components_cached(address: str) -> Tuple[str, str, str, str, str]:
+    """
+    Memoized implementation of AddressNormalizer.extract_address_components.
+    
+    Returns an immutable (full_address, street, city, state, zip) tuple so
+    cached results cannot be mutated by callers.
+    """
+    parts = [p.strip() for p in address.split(',')]
+    
+    street = city = state = zip_code = ''
+    
+    if len(parts) >= 1:
+        street = parts[0]
+    if len(parts) >= 2:
+        city = parts[1]
+    if len(parts) >= 3:
+        # Try to extract state and ZIP
+        state, zip_code = _parse_state_zip(parts[2].strip())
+    
+    return (address, street, city, state, zip_code)
+
+
+def _is_ascii_digits(value: str) -> bool:
+    """True if value is non-empty and made only of ASCII digits."""
+    return value.isascii() and value.isdigit()
+
+
+def _parse_state_zip(state_zip: str) -> Tuple[str, str]:
+    """
+    Split a "WA 98101" style string into (state, zip).
+    
+    The common shapes ("WA", "WA 98101", "WA 98101-1234") are handled with
+    plain string checks; anything else goes through _STATE_ZIP_RE.
+    """
+    parts = state_zip.split()
+    if 1 <= len(parts) <= 2:
+        state = parts[0]
+        if len(state) == 2 and state.isascii() and state.isalpha() and state.isupper():
+            if len(parts) == 1:
+                return (state, '')
+            zip_code = parts[1]
+            if len(zip_code) == 5 and _is_ascii_digits(zip_code):
+                return (state, zip_code)
+            if (len(zip_code) == 10 and zip_code[5] == '-'
+                    and _is_ascii_digits(zip_code[:5]) and _is_ascii_digits(zip_code[6:])):
+                return (state, zip_code)
+    
+    state_zip_match = _STATE_ZIP_RE.match(state_zip)
+    if not state_zip_match:
+        return ('', '')
+    return (state_zip_match.group(1), state_zip_match.group(2) or '')
+
+
+def _location_components(listing: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    Get (city, state, zip) for a listing's raw fields.
+    
+    Tries the new structure first (address_city, address_state, address_zip)
+    and falls back to extracting from the full address. Values are strings
+    even when the source has a number (e.g. a ZIP of 98101 read from JSON).
+    """
+    city = str(listing.get('address_city') or '')
+    state = str(listing.get('address_state') or '')
+    zip_code = str(listing.get('address_zip') or '')
+    
+    # If not found, extract from full address
+    if not city or not state:
+        _, _, comp_city, comp_state, comp_zip = _extract_address_components_cached(
+            listing.get('address_full') or listing.get('address', '')
+        )
+        city = city or comp_city
+        state = state or comp_state
+        zip_code = zip_code or comp_zip
+    
+    return (city, state, zip_code)
+
+
+def _to_float(value: Any) -> float:
+    """
+    Convert a numeric field to float, using NaN for missing or bad values.
+    
+    Zero and negative values (including strings such as '0') are NaN as
+    well: they cannot be compared as a relative difference, which divides
+    by the larger value.
+    """
+    if not value:
+        return np.nan
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return np.nan
+    return number if number > 0 else np.nan
+
+
+def _category_codes(values: List[Any]) -> np.ndarray:
+    """
+    Integer code per value, equal for equal values and -1 for empty ones.
+    
+    Codes are handed out through a dict rather than by sorting, so values
+    of mixed types never need to be ordered against each other.
+    """
+    ids = {'': -1}
+    return np.array([ids.setdefault(value, len(ids) - 1) for value in values], dtype=np.intp)
+
+
+def _pair_equal(codes: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Mask of pairs whose category codes are equal and non-empty."""
+    return (codes[left] == codes[right]) & (codes[left] >= 0)
+
+
+def _pair_variance(values: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """|a - b| / max(a, b) per pair; NaN where either value is missing."""
+    a = values[left]
+    b = values[right]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(a - b) / np.maximum(a, b)
+
+
+# Upper bound on the pairs scored at once, so the per-pair arrays of a large
+# block take a few tens of MB instead of growing with its square
+_PAIR_CHUNK_SIZE = 1 << 18
+
+
+def _upper_pairs(n: int, chunk_size: int = _PAIR_CHUNK_SIZE):
+    """
+    Yield the index pairs (i, j), i < j < n, in chunks of whole rows.
+    
+    A chunk holds at most chunk_size pairs, or a single row if that is
+    longer; together the chunks cover np.triu_indices(n, k=1) in order.
+    
+    Yields:
+        (left, right) index arrays of one chunk
+    """
+    start = 0
+    while start < n - 1:
+        stop = start + 1
+        count = n - 1 - start
+        while stop < n - 1 and count + (n - 1 - stop) <= chunk_size:
+            count += n - 1 - stop
+            stop += 1
+        rows = np.arange(start, stop)
+        left = np.repeat(rows, n - 1 - rows)
+        right = np.concatenate([np.arange(i + 1, n) for i in rows])
+        yield left, right
+        start = stop
+
+
+def _extract_match_features(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse the fields used for matching out of a listing's raw fields.
+    
+    Returns:
+        Dict with '_addr_norm', '_street_norm' (street part only),
+        '_loc_key' (city, state, zip; city and state upper-cased),
+        '_type_upper', '_size_float' and '_price_float' (NaN when missing)
+    """
+    city, state, zip_code = _location_components(fields)
+    home_type = str(fields.get('homeType') or fields.get('property_type') or '')
+    address = fields.get('address_full') or fields.get('address', '')
+    
+    return {
+        '_addr_norm': _normalize_address_cached(address),
+        '_street_norm': _normalize_address_cached(
+            fields.get('address_street') or address.split(',', 1)[0]
+        ),
+        '_loc_key': (city.upper(), state.upper(), zip_code),
+        '_type_upper': home_type.upper() if home_type else '',
+        '_size_float': _to_float(
+            fields.get('area') or fields.get('square_feet') or fields.get('sqft')
+        ),
+        '_price_float': _to_float(fields.get('unformattedPrice') or fields.get('price'))
+    }
+
+
+def _match_features(listing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the matching slots of a listing, preferring precomputed ones.
+    
+    Slot dicts built by _extract_match_features (as CentralProcessingNode
+    passes to batch_score) are used as-is; plain raw-field dicts are parsed
+    on the fly.
+    """
+    if '_loc_key' in listing:
+        return listing
+    return _extract_match_features(listing)
 
 
 class PropertyMatcher:
     """Match properties across different listing platforms."""
     
+    # Minimum token-set similarity (0-100) for a non-exact address to score
+    ADDRESS_SIMILARITY_CUTOFF = 90
+    
+    @staticmethod
+    def address_score(addr1: str, addr2: str, street1: str, street2: str) -> float:
+        """
+        Score the address component of a match (0 to 0.40).
+        
+        Identical addresses get the full weight. Otherwise the fuzzy token-set
+        similarity of the street parts earns up to 0.30, but only when the
+        street numbers agree, so neighbouring houses on the same street never
+        look alike, and when the unit numbers agree or one side has none, so
+        different units of one building stay apart (token-set similarity
+        rates a subset, even one extra unit token, as near-identical). City,
+        state and ZIP are left out of the fuzzy comparison:
+        a long shared tail would otherwise lift different streets over the
+        cutoff (they are scored separately anyway).
+        
+        Args:
+            addr1: First normalized address
+            addr2: Second normalized address
+            street1: First normalized street (address before the first comma)
+            street2: Second normalized street
+            
+        Returns:
+            Address score between 0 and 0.40
+        """
+        if not addr1 or not addr2:
+            return 0.0
+        if addr1 == addr2:
+            return 0.40
+        if not street1 or not street2 or street1.split(' ', 1)[0] != street2.split(' ', 1)[0]:
+            return 0.0
+        unit1 = _unit_designation(addr1)
+        unit2 = _unit_designation(addr2)
+        if unit1 and unit2 and unit1 != unit2:
+            return 0.0
+        
+        similarity = fuzz.token_set_ratio(
+            street1, street2, score_cutoff=PropertyMatcher.ADDRESS_SIMILARITY_CUTOFF
+        )
+        return 0.30 * similarity / 100.0
+    
+    @staticmethod
+    def address_scores(
+        addresses1: List[str],
+        addresses2: List[str],
+        streets1: List[str],
+        streets2: List[str],
+        workers: int = -1
+    ) -> np.ndarray:
+        """
+        Score the address component of many pairs at once.
+        
+        Element-wise equivalent of address_score, but the similarities are
+        computed natively by RapidFuzz, by default across all cores.
+        
+        Args:
+            addresses1: Normalized addresses of the first listing of each pair
+            addresses2: Normalized addresses of the second listing of each pair
+            streets1: Normalized streets of the first listing of each pair
+            streets2: Normalized streets of the second listing of each pair
+            workers: RapidFuzz threads (-1 = one per core); pass 1 from a
+                process that already runs alongside one per core
+            
+        Returns:
+            Array of address scores, one per pair
+        """
+        similarity = process.cpdist(
+            streets1,
+            streets2,
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=PropertyMatcher.ADDRESS_SIMILARITY_CUTOFF,
+            dtype=np.float64,
+            workers=workers
+        )
+        
+        addrs1 = np.array(addresses1, dtype=object)
+        addrs2 = np.array(addresses2, dtype=object)
+        numbers1 = np.array([a.split(' ', 1)[0] for a in streets1], dtype=object)
+        numbers2 = np.array([a.split(' ', 1)[0] for a in streets2], dtype=object)
+        units1 = np.array([_unit_designation(a) for a in addresses1], dtype=object)
+        units2 = np.array([_unit_designation(a) for a in addresses2], dtype=object)
+        
+        comparable = (
+            (numbers1 == numbers2) & (numbers1 != '')
+            & ((units1 == units2) | (units1 == '') | (units2 == ''))
+        )
+        scores = np.where(comparable, 0.30 * similarity / 100.0, 0.0)
+        scores[addrs1 == addrs2] = 0.40
+        scores[(addrs1 == '') | (addrs2 == '')] = 0.0
+        return scores
+    
     @staticmethod
     def calculate_match_score(
         listing1: Dict[str, Any],
-        listing2: Dict[str, Any]
+        listing2: Dict[str, Any],
+        threshold: Optional[float] = None
     ) -> float:
         """
         Calculate match confidence score between two listings.
@@ -138,108 +456,80 @@ class PropertyMatcher:
           (Size Match × 0.15) +
           (Price Range Match × 0.10)
         
+        If a threshold is given, scoring stops as soon as the remaining
+        components can no longer lift the pair to it; the partial score
+        returned is then still below the threshold.
+        
         Args:
             listing1: First listing dict
             listing2: Second listing dict
+            threshold: Optional match threshold to prune against
             
         Returns:
             Match score between 0 and 1
         """
+        features1 = _match_features(listing1)
+        features2 = _match_features(listing2)
         score = 0.0
         
         # Address match (40%)
-        # Handle both old ('address') and new ('address_full') field names
-        addr1 = AddressNormalizer.normalize_address(
-            listing1.get('address_full') or listing1.get('address', '')
+        score += PropertyMatcher.address_score(
+            features1['_addr_norm'], features2['_addr_norm'],
+            features1['_street_norm'], features2['_street_norm']
         )
-        addr2 = AddressNormalizer.normalize_address(
-            listing2.get('address_full') or listing2.get('address', '')
-        )
-        
-        if addr1 and addr2:
-            # Simple string similarity (can be enhanced with fuzzy matching)
-            if addr1 == addr2:
-                score += 0.40
-            elif addr1 in addr2 or addr2 in addr1:
-                score += 0.30
+        if threshold is not None and score + 0.60 < threshold:
+            return score
         
         # City/State/ZIP match (20%)
-        # Try new structure first (address_city, address_state, address_zip)
-        # Fall back to extracting from full address
-        city1 = listing1.get('address_city') or ''
-        city2 = listing2.get('address_city') or ''
-        state1 = listing1.get('address_state') or ''
-        state2 = listing2.get('address_state') or ''
-        zip1 = listing1.get('address_zip') or ''
-        zip2 = listing2.get('address_zip') or ''
-        
-        # If not found, extract from full address
-        if not city1 or not state1:
-            comp1 = AddressNormalizer.extract_address_components(
-                listing1.get('address_full') or listing1.get('address', '')
-            )
-            city1 = city1 or comp1['city']
-            state1 = state1 or comp1['state']
-            zip1 = zip1 or comp1['zip']
-        
-        if not city2 or not state2:
-            comp2 = AddressNormalizer.extract_address_components(
-                listing2.get('address_full') or listing2.get('address', '')
-            )
-            city2 = city2 or comp2['city']
-            state2 = state2 or comp2['state']
-            zip2 = zip2 or comp2['zip']
+        city1, state1, zip1 = features1['_loc_key']
+        city2, state2, zip2 = features2['_loc_key']
         
         location_match = 0
-        if city1 and city2 and city1.upper() == city2.upper():
+        if city1 and city1 == city2:
             location_match += 0.07
-        if state1 and state2 and state1.upper() == state2.upper():
+        if state1 and state1 == state2:
             location_match += 0.07
-        if zip1 and zip2 and zip1 == zip2:
+        if zip1 and zip1 == zip2:
             location_match += 0.06
         score += location_match
+        if threshold is not None and score + 0.40 < threshold:
+            return score
         
         # Property type match (15%)
         # Note: This is simplified - actual implementation should map various property types
-        type1 = listing1.get('homeType') or listing1.get('property_type', '')
-        type2 = listing2.get('homeType') or listing2.get('property_type', '')
-        type1 = type1.upper() if type1 else ''
-        type2 = type2.upper() if type2 else ''
-        if type1 and type2 and type1 == type2:
+        type1 = features1['_type_upper']
+        type2 = features2['_type_upper']
+        if type1 and type1 == type2:
             score += 0.15
+        if threshold is not None and score + 0.25 < threshold:
+            return score
         
-        # Size match (15%)
-        size1 = listing1.get('area') or listing1.get('square_feet') or listing1.get('sqft')
-        size2 = listing2.get('area') or listing2.get('square_feet') or listing2.get('sqft')
+        # Size match (15%), missing sizes are NaN and never score
+        size1 = features1['_size_float']
+        size2 = features2['_size_float']
         
-        if size1 and size2:
-            try:
-                size1, size2 = float(size1), float(size2)
-                variance = abs(size1 - size2) / max(size1, size2)
-                if variance < 0.05:  # Within 5%
-                    score += 0.15
-                elif variance < 0.10:  # Within 10%
-                    score += 0.10
-                elif variance < 0.15:  # Within 15%
-                    score += 0.05
-            except (ValueError, ZeroDivisionError):
-                pass
+        if not (math.isnan(size1) or math.isnan(size2)):
+            variance = abs(size1 - size2) / max(size1, size2)
+            if variance < 0.05:  # Within 5%
+                score += 0.15
+            elif variance < 0.10:  # Within 10%
+                score += 0.10
+            elif variance < 0.15:  # Within 15%
+                score += 0.05
+        if threshold is not None and score + 0.10 < threshold:
+            return score
         
         # Price range match (10%)
         # Handle both unformattedPrice (new) and price (old)
-        price1 = listing1.get('unformattedPrice') or listing1.get('price')
-        price2 = listing2.get('unformattedPrice') or listing2.get('price')
+        price1 = features1['_price_float']
+        price2 = features2['_price_float']
         
-        if price1 and price2:
-            try:
-                price1, price2 = float(price1), float(price2)
-                variance = abs(price1 - price2) / max(price1, price2)
-                if variance < 0.05:  # Within 5%
-                    score += 0.10
-                elif variance < 0.20:  # Within 20%
-                    score += 0.05
-            except (ValueError, ZeroDivisionError):
-                pass
+        if not (math.isnan(price1) or math.isnan(price2)):
+            variance = abs(price1 - price2) / max(price1, price2)
+            if variance < 0.05:  # Within 5%
+                score += 0.10
+            elif variance < 0.20:  # Within 20%
+                score += 0.05
         
         return score
     
@@ -258,10 +548,203 @@ class PropertyMatcher:
             threshold: Minimum score to consider a match
             
         Returns:
-            Tuple of (is_match, score)
+            Tuple of (is_match, score); for non-matches the score may be
+            partial, see calculate_match_score
         """
-        score = PropertyMatcher.calculate_match_score(listing1, listing2)
+        score = PropertyMatcher.calculate_match_score(listing1, listing2, threshold)
         return (score >= threshold, score)
+    
+    @staticmethod
+    def calculate_match_scores(
+        pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> np.ndarray:
+        """
+        Calculate match scores for a batch of listing pairs.
+        
+        Same weights and results as calculate_match_score, computed for all
+        pairs at once with NumPy.
+        
+        Args:
+            pairs: List of (listing1, listing2) tuples
+            
+        Returns:
+            Array of match scores, one per pair
+        """
+        n = len(pairs)
+        features = [_match_features(l) for l, _ in pairs] + [_match_features(l) for _, l in pairs]
+        return PropertyMatcher._score_pairs(
+            PropertyMatcher._feature_columns(features), np.arange(n), np.arange(n, 2 * n)
+        )
+    
+    @staticmethod
+    def is_match_batch(
+        pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        threshold: float = 0.70
+    ) -> np.ndarray:
+        """
+        Determine for a batch of listing pairs which represent the same property.
+        
+        Args:
+            pairs: List of (listing1, listing2) tuples
+            threshold: Minimum score to consider a match
+            
+        Returns:
+            Boolean array, one entry per pair
+        """
+        n = len(pairs)
+        features = [_match_features(l) for l, _ in pairs] + [_match_features(l) for _, l in pairs]
+        scores = PropertyMatcher._score_pairs(
+            PropertyMatcher._feature_columns(features), np.arange(n), np.arange(n, 2 * n), threshold
+        )
+        return scores >= threshold
+    
+    @staticmethod
+    def batch_score(
+        listings: List[Dict[str, Any]],
+        threshold: float = 0.70
+    ) -> np.ndarray:
+        """
+        Calculate match scores between every pair of listings at once.
+        
+        Pairs that cannot reach the threshold even with a perfect address
+        skip address scoring, so their entries may omit that component.
+        
+        Args:
+            listings: List of listing dicts (raw fields or precomputed match slots)
+            threshold: Minimum score a pair needs to be considered a match
+            
+        Returns:
+            Symmetric N x N matrix of match scores (zero diagonal)
+        """
+        n = len(listings)
+        columns = PropertyMatcher._feature_columns([_match_features(l) for l in listings])
+        
+        scores = np.zeros((n, n))
+        for left, right in _upper_pairs(n):
+            pair_scores = PropertyMatcher._score_pairs(columns, left, right, threshold)
+            scores[left, right] = pair_scores
+            scores[right, left] = pair_scores
+        return scores
+    
+    @staticmethod
+    def _feature_columns(features: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Lay out the match slots of many listings as per-field columns.
+        
+        Built once per batch, so scoring its pairs in chunks only indexes
+        into these.
+        
+        Args:
+            features: Match slots from _extract_match_features
+            
+        Returns:
+            Dict of category code arrays ('cities', 'states', 'zips', 'types',
+            'numbers' for street numbers, 'address_codes' for whole
+            addresses), float arrays ('sizes', 'prices') and string lists
+            ('addresses', 'streets'), each indexed by listing
+        """
+        return {
+            'numbers': _category_codes([f['_street_norm'].split(' ', 1)[0] for f in features]),
+            'address_codes': _category_codes([f['_addr_norm'] for f in features]),
+            'cities': _category_codes([f['_loc_key'][0] for f in features]),
+            'states': _category_codes([f['_loc_key'][1] for f in features]),
+            'zips': _category_codes([f['_loc_key'][2] for f in features]),
+            'types': _category_codes([f['_type_upper'] for f in features]),
+            'sizes': np.array([f['_size_float'] for f in features], dtype=np.float64),
+            'prices': np.array([f['_price_float'] for f in features], dtype=np.float64),
+            'addresses': [f['_addr_norm'] for f in features],
+            'streets': [f['_street_norm'] for f in features]
+        }
+    
+    @staticmethod
+    def _score_pairs(
+        columns: Dict[str, Any],
+        left: np.ndarray,
+        right: np.ndarray,
+        threshold: Optional[float] = None,
+        workers: int = -1
+    ) -> np.ndarray:
+        """
+        Score the pairs (listing left[k], listing right[k]).
+        
+        Args:
+            columns: Listing fields from _feature_columns
+            left: Index of the first listing of each pair
+            right: Index of the second listing of each pair
+            threshold: If given, pairs that cannot reach it even with a
+                perfect address skip address scoring
+            workers: RapidFuzz threads for the address comparison
+            
+        Returns:
+            Array of match scores, one per pair
+        """
+        # City/State/ZIP match (20%)
+        cities = columns['cities']
+        states = columns['states']
+        zips = columns['zips']
+        location = (
+            np.where(_pair_equal(cities, left, right), 0.07, 0.0)
+            + np.where(_pair_equal(states, left, right), 0.07, 0.0)
+            + np.where(_pair_equal(zips, left, right), 0.06, 0.0)
+        )
+        
+        # Property type match (15%)
+        types = columns['types']
+        type_score = np.where(_pair_equal(types, left, right), 0.15, 0.0)
+        
+        # Size match (15%)
+        size_variance = _pair_variance(columns['sizes'], left, right)
+        size_score = np.where(size_variance < 0.05, 0.15,
+                     np.where(size_variance < 0.10, 0.10,
+                     np.where(size_variance < 0.15, 0.05, 0.0)))
+        
+        # Price range match (10%)
+        price_variance = _pair_variance(columns['prices'], left, right)
+        price_score = np.where(price_variance < 0.05, 0.10,
+                      np.where(price_variance < 0.20, 0.05, 0.0))
+        
+        # Address match (40%). Only identical addresses or equal street
+        # numbers can score, and only pairs that could still reach threshold
+        # are worth the fuzzy comparison
+        address = np.zeros(len(left))
+        scorable = (
+            _pair_equal(columns['numbers'], left, right)
+            | _pair_equal(columns['address_codes'], left, right)
+        )
+        if threshold is not None:
+            partial = location + type_score + size_score + price_score
+            scorable &= partial + 0.40 >= threshold
+        candidates = np.flatnonzero(scorable)
+        if len(candidates):
+            addresses = columns['addresses']
+            streets = columns['streets']
+            address[candidates] = PropertyMatcher.address_scores(
+                [addresses[i] for i in left[candidates]],
+                [addresses[i] for i in right[candidates]],
+                [streets[i] for i in left[candidates]],
+                [streets[i] for i in right[candidates]],
+                workers
+            )
+        
+        return address + location + type_score + size_score + price_score
+
+
+def _range_variance(values: List[float]) -> float:
+    """
+    Relative spread (max - min) / max of numeric values, found in one pass.
+    
+    Returns 0.0 when the maximum is not positive.
+    """
+    min_val = max_val = values[0]
+    for value in values:
+        if value < min_val:
+            min_val = value
+        elif value > max_val:
+            max_val = value
+    
+    if max_val <= 0:
+        return 0.0
+    return (max_val - min_val) / max_val
 
 
 class DataConsolidator:
@@ -270,7 +753,7 @@ class DataConsolidator:
     @staticmethod
     def get_field_precedence(
         field_name: str,
-        listings: List[Dict[str, Any]]
+        listings: List[RawListingRecord]
     ) -> Any:
         """
         Determine the best value for a field based on precedence rules.
@@ -282,31 +765,25 @@ class DataConsolidator:
         
         Args:
             field_name: Name of the field
-            listings: List of listing dicts
+            listings: List of raw listing records
             
         Returns:
             Best value for the field
         """
         # Filter listings that have this field
-        candidates = [l for l in listings if field_name in l.get('raw_fields', {})]
+        candidates = [l for l in listings if field_name in l.raw_fields]
         
         if not candidates:
             return None
         
-        # Sort by extraction timestamp (most recent first)
-        sorted_listings = sorted(
-            candidates,
-            key=lambda x: x.get('extraction_timestamp', datetime.min),
-            reverse=True
-        )
-        
-        # Return value from most recent listing
-        return sorted_listings[0].get('raw_fields', {}).get(field_name)
+        # Return value from most recent listing (earliest listing wins ties)
+        most_recent = max(candidates, key=lambda x: _utc_timestamp(x.extraction_timestamp))
+        return most_recent.raw_fields.get(field_name)
     
     @staticmethod
     def detect_conflicts(
         field_name: str,
-        listings: List[Dict[str, Any]],
+        listings: List[RawListingRecord],
         variance_threshold: float = 0.05
     ) -> Optional[Dict[str, Any]]:
         """
@@ -314,7 +791,7 @@ class DataConsolidator:
         
         Args:
             field_name: Field to check
-            listings: List of listing dicts
+            listings: List of raw listing records
             variance_threshold: Acceptable variance for numeric fields
             
         Returns:
@@ -322,10 +799,10 @@ class DataConsolidator:
         """
         values = []
         for listing in listings:
-            val = listing.get('raw_fields', {}).get(field_name)
+            val = listing.raw_fields.get(field_name)
             if val is not None:
                 values.append({
-                    'source': listing.get('source_platform'),
+                    'source': listing.source_platform,
                     'value': val
                 })
         
@@ -337,18 +814,14 @@ class DataConsolidator:
         
         # For numeric values, check variance
         if isinstance(first_val, (int, float)):
-            max_val = max(v['value'] for v in values)
-            min_val = min(v['value'] for v in values)
+            variance = _range_variance([v['value'] for v in values])
             
-            if max_val > 0:
-                variance = (max_val - min_val) / max_val
-                
-                if variance > variance_threshold:
-                    return {
-                        'field': field_name,
-                        'values': values,
-                        'variance_percent': variance * 100
-                    }
+            if variance > variance_threshold:
+                return {
+                    'field': field_name,
+                    'values': values,
+                    'variance_percent': variance * 100
+                }
         
         # For string values, check exact match
         else:
@@ -361,6 +834,88 @@ class DataConsolidator:
                 }
         
         return None
+    
+    @staticmethod
+    def consolidate_field(
+        field_name: str,
+        listings: List[RawListingRecord],
+        variance_threshold: float = 0.05
+    ) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Get the best value for a field and detect conflicts in a single pass.
+        
+        Equivalent to calling get_field_precedence and detect_conflicts, but
+        walks the listings only once.
+        
+        Args:
+            field_name: Name of the field
+            listings: List of raw listing records
+            variance_threshold: Acceptable variance for numeric fields
+            
+        Returns:
+            Tuple of (best_value, conflict); conflict is None if there is none
+        """
+        best_timestamp = None
+        best_value = None
+        values = []
+        numeric = False
+        min_val = max_val = None
+        unique_vals = set()
+        
+        for listing in listings:
+            fields = listing.raw_fields
+            if field_name not in fields:
+                continue
+            val = fields[field_name]
+            
+            # Most recent listing wins (earliest listing wins ties)
+            timestamp = _utc_timestamp(listing.extraction_timestamp)
+            if best_timestamp is None or timestamp > best_timestamp:
+                best_timestamp = timestamp
+                best_value = val
+            
+            if val is None:
+                continue
+            
+            # The first value decides whether the field is compared numerically
+            if not values:
+                numeric = isinstance(val, (int, float))
+                min_val = max_val = val
+            values.append({
+                'source': listing.source_platform,
+                'value': val
+            })
+            
+            if numeric:
+                if val < min_val:
+                    min_val = val
+                elif val > max_val:
+                    max_val = val
+            else:
+                unique_vals.add(str(val))
+        
+        if len(values) <= 1:
+            return (best_value, None)
+        
+        # For numeric values, check variance
+        if numeric:
+            variance = (max_val - min_val) / max_val if max_val > 0 else 0.0
+            if variance > variance_threshold:
+                return (best_value, {
+                    'field': field_name,
+                    'values': values,
+                    'variance_percent': variance * 100
+                })
+        
+        # For string values, check exact match
+        elif len(unique_vals) > 1:
+            return (best_value, {
+                'field': field_name,
+                'values': values,
+                'variance_percent': None
+            })
+        
+        return (best_value, None)
 
 
 class PropertyClassifier:
@@ -373,12 +928,17 @@ class PropertyClassifier:
     MAX_DAYS_ON_MARKET = 365
     
     @staticmethod
-    def classify_property(consolidated_data: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[Dict[str, Any]]]:
+    def classify_property(
+        consolidated_data: Dict[str, Any],
+        now: Optional[datetime] = None
+    ) -> Tuple[str, Optional[str], Optional[Dict[str, Any]]]:
         """
         Classify a consolidated property.
         
         Args:
             consolidated_data: Consolidated property data
+            now: Timestamp to record as the discard date (defaults to now);
+                pass one shared value when classifying a whole batch
             
         Returns:
             Tuple of (classification, discard_reason, discard_details)
@@ -392,7 +952,7 @@ class PropertyClassifier:
             return ('discarded', 'missing_critical_fields', {
                 'reason_category': 'incomplete_data',
                 'explanation': f"Missing required fields: {', '.join(missing_fields)}",
-                'discarded_date': datetime.utcnow().isoformat()
+                'discarded_date': (now or datetime.now(timezone.utc)).isoformat()
             })
         
         # Check property type (if available)
@@ -421,7 +981,7 @@ class PropertyClassifier:
         #     return ('discarded', 'outside_investment_mandate', {
         #         'reason_category': 'asset_class_mismatch',
         #         'explanation': f"Property type '{prop_type}' outside mandate (focus: {', '.join(PropertyClassifier.ALLOWED_PROPERTY_TYPES)})",
-        #         'discarded_date': datetime.utcnow().isoformat()
+        #         'discarded_date': (now or datetime.now(timezone.utc)).isoformat()
         #     })
         
         # Check price range - handle both unformattedPrice (new) and price (old)
@@ -431,15 +991,17 @@ class PropertyClassifier:
                 # If it's a string, try to extract number
                 if isinstance(price, str):
                     # Remove currency symbols and commas
-                    import re
-                    price = re.sub(r'[^\d.]', '', price)
+                    cleaned = price.translate(_CURRENCY_STRIP)
+                    if not cleaned.replace('.', '').isdecimal():
+                        cleaned = _PRICE_CLEAN_RE.sub('', price)
+                    price = cleaned
                 
                 price = float(price)
                 if price < PropertyClassifier.MIN_PRICE or price > PropertyClassifier.MAX_PRICE:
                     return ('discarded', 'outside_investment_mandate', {
                         'reason_category': 'price_out_of_range',
                         'explanation': f"Price ${price:,.0f} outside range (${PropertyClassifier.MIN_PRICE:,.0f} - ${PropertyClassifier.MAX_PRICE:,.0f})",
-                        'discarded_date': datetime.utcnow().isoformat()
+                        'discarded_date': (now or datetime.now(timezone.utc)).isoformat()
                     })
             except (ValueError, TypeError):
                 pass
@@ -458,6 +1020,64 @@ class PropertyClassifier:
         return ('usable', None, None)
 
 
+def _group_bucket(features: List[Dict[str, Any]], workers: int = -1) -> List[List[int]]:
+    """
+    Group the listings of a single block by pairwise matching.
+    
+    Matches are transitive: if A matches B and B matches C, all three
+    end up in the same group even when A and C do not match directly.
+    Listings with the same ZIP and normalized address always match.
+    Defined at module level so it can run in a worker process.
+    
+    Args:
+        features: Match slots of the listings in the block
+        workers: RapidFuzz threads; 1 in pool workers, which already run
+            one per core
+        
+    Returns:
+        List of groups, each a list of positions into features in ascending order
+    """
+    n = len(features)
+    
+    # Listings sharing a ZIP and normalized address are the same property
+    # outright; listings missing either get a signature of their own
+    signature_ids = {}
+    signatures = np.array([
+        signature_ids.setdefault((f['_loc_key'][2], f['_addr_norm']), len(signature_ids))
+        if f['_loc_key'][2] and f['_addr_norm'] else -1 - pos
+        for pos, f in enumerate(features)
+    ])
+    
+    # Score the pairs with different signatures a chunk at a time, keeping
+    # only the matching ones, so memory stays flat however large the block
+    columns = PropertyMatcher._feature_columns(features)
+    matched_left = []
+    matched_right = []
+    for left, right in _upper_pairs(n):
+        matches = signatures[left] == signatures[right]
+        pending = ~matches
+        matches[pending] = PropertyMatcher._score_pairs(
+            columns, left[pending], right[pending], 0.70, workers
+        ) >= 0.70
+        matched_left.append(left[matches])
+        matched_right.append(right[matches])
+    
+    # Listings connected by any chain of matches form one group
+    left = np.concatenate(matched_left) if matched_left else np.zeros(0, dtype=np.intp)
+    right = np.concatenate(matched_right) if matched_right else np.zeros(0, dtype=np.intp)
+    adjacency = csr_matrix(
+        (np.ones(len(left), dtype=bool), (left, right)),
+        shape=(n, n)
+    )
+    n_groups, labels = connected_components(adjacency, directed=False)
+    
+    groups = [[] for _ in range(n_groups)]
+    for pos, label in enumerate(labels):
+        groups[label].append(pos)
+    
+    return groups
+
+
 class CentralProcessingNode:
     """
     Central processing and normalization node.
@@ -469,6 +1089,11 @@ class CentralProcessingNode:
     - Property classification
     """
     
+    # Match blocks in worker processes only when the batch is big enough to
+    # repay the pool start-up cost
+    PARALLEL_MIN_BLOCKS = 4
+    PARALLEL_MIN_LISTINGS = 2000
+    
     def __init__(self):
         self.address_normalizer = AddressNormalizer()
         self.property_matcher = PropertyMatcher()
@@ -488,75 +1113,131 @@ class CentralProcessingNode:
         Returns:
             List of consolidated property records
         """
-        # Convert to dict format for easier processing
-        listings_dict = [
-            {
-                'source_platform': l.source_platform,
-                'extraction_timestamp': l.extraction_timestamp,
-                'listing_id': l.listing_id_native,
-                'raw_fields': l.raw_fields,
-                'metadata': l.metadata
-            }
-            for l in raw_listings
-        ]
-        
         # Group listings by property (simple approach - can be enhanced)
-        property_groups = self._group_listings(listings_dict)
+        property_groups = self._group_listings(raw_listings)
         
-        # Consolidate each group
+        # Consolidate each group, stamping the whole batch with one timestamp
+        now = datetime.now(timezone.utc)
+        consolidate_group = self._consolidate_group
         consolidated_properties = []
         for group_id, group_listings in enumerate(property_groups):
-            consolidated = self._consolidate_group(group_id, group_listings)
+            consolidated = consolidate_group(group_id, group_listings, now)
             consolidated_properties.append(consolidated)
         
         return consolidated_properties
     
     def _group_listings(
         self,
-        listings: List[Dict[str, Any]]
-    ) -> List[List[Dict[str, Any]]]:
+        listings: List[RawListingRecord]
+    ) -> List[List[RawListingRecord]]:
         """
         Group listings that represent the same property.
         
         Args:
-            listings: List of listing dicts
+            listings: List of raw listing records
             
         Returns:
             List of listing groups
         """
-        groups = []
-        processed = set()
+        # Parse the matching fields once per listing rather than once per pair,
+        # kept in a list parallel to listings so the records stay untouched
+        features = [_extract_match_features(l.raw_fields) for l in listings]
         
-        for i, listing1 in enumerate(listings):
-            if i in processed:
-                continue
-            
-            # Start new group
-            group = [listing1]
-            processed.add(i)
-            
-            # Find matches
-            for j, listing2 in enumerate(listings[i+1:], start=i+1):
-                if j in processed:
-                    continue
-                
-                is_match, score = self.property_matcher.is_match(
-                    listing1['raw_fields'],
-                    listing2['raw_fields']
-                )
-                
-                if is_match:
-                    group.append(listing2)
-                    processed.add(j)
+        # Block on location so only listings that share a city are compared
+        # pairwise. A listing with no city cannot be placed in one, so it
+        # joins every city block of its state; all the listings of a state
+        # without any city block form one block of their own.
+        city_blocks = defaultdict(list)
+        cityless = defaultdict(list)
+        for index, (state, city) in enumerate(self._blocking_keys(features)):
+            if city:
+                city_blocks[(state, city)].append(index)
+            else:
+                cityless[state].append(index)
+        
+        block_indices = [
+            sorted(indices + cityless.get(state, []))
+            for (state, _), indices in city_blocks.items()
+        ]
+        states_with_cities = {state for state, _ in city_blocks}
+        block_indices.extend(
+            indices for state, indices in cityless.items() if state not in states_with_cities
+        )
+        
+        # Blocks are independent, so large batches are matched across cores.
+        # Workers only receive the match slots, not the full raw fields.
+        block_features = [[features[i] for i in indices] for indices in block_indices]
+        
+        if (len(block_indices) >= self.PARALLEL_MIN_BLOCKS
+                and len(listings) >= self.PARALLEL_MIN_LISTINGS):
+            with multiprocessing.Pool() as pool:
+                block_groups = pool.map(partial(_group_bucket, workers=1), block_features)
+        else:
+            block_groups = [_group_bucket(f) for f in block_features]
+        
+        # A city-less listing can be grouped in several blocks; groups that
+        # share a listing are one property, so link each group's members to
+        # its first listing and take the connected components
+        first = []
+        others = []
+        for indices, local_groups in zip(block_indices, block_groups):
+            for group in local_groups:
+                head = indices[group[0]]
+                for pos in group[1:]:
+                    first.append(head)
+                    others.append(indices[pos])
+        n = len(listings)
+        links = csr_matrix(
+            (np.ones(len(first), dtype=bool), (first, others)),
+            shape=(n, n)
+        )
+        n_groups, labels = connected_components(links, directed=False)
+        
+        # Keep groups in order of their first listing, as a single pass would
+        groups = [[] for _ in range(n_groups)]
+        for index, label in enumerate(labels):
+            groups[label].append(index)
+        groups.sort(key=lambda group: group[0])
+        return [[listings[i] for i in group] for group in groups]
+    
+    @staticmethod
+    def _blocking_keys(features: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """
+        Get the (state, city) key used to bucket each listing before matching.
+        
+        The ZIP is deliberately not part of the key: it is often missing
+        from one copy of a listing, and listings in different blocks are
+        never compared. A listing without a state takes the state of other
+        listings with its city, or failing that its ZIP, so it can still
+        meet them.
+        
+        Args:
+            features: Match slots of the listings (see _extract_match_features)
             
-            groups.append(group)
+        Returns:
+            (state, city) per listing; either may be '' when unknown
+        """
+        city_states = {}
+        zip_states = {}
+        for listing_features in features:
+            city, state, zip_code = listing_features['_loc_key']
+            if state:
+                if city:
+                    city_states.setdefault(city, state)
+                if zip_code:
+                    zip_states.setdefault(zip_code, state)
         
-        return groups
+        keys = []
+        for listing_features in features:
+            city, state, zip_code = listing_features['_loc_key']
+            keys.append((state or city_states.get(city) or zip_states.get(zip_code, ''), city))
+        return keys
     
     def _consolidate_group(
         self,
         group_id: int,
-        group_listings: List[Dict[str, Any]]
+        group_listings: List[RawListingRecord],
+        now: Optional[datetime] = None
     ) -> ConsolidatedProperty:
         """
         Consolidate a group of listings into a single property.
@@ -564,6 +1245,7 @@ class CentralProcessingNode:
         Args:
             group_id: Unique identifier for the group
             group_listings: List of listings in the group
+            now: Processing timestamp (defaults to now)
             
         Returns:
             ConsolidatedProperty object
@@ -577,15 +1259,13 @@ class CentralProcessingNode:
         
         consolidated_data = {}
         conflicts = []
+        consolidate_field = self.data_consolidator.consolidate_field
         
         for field in common_fields:
-            # Get best value
-            value = self.data_consolidator.get_field_precedence(field, group_listings)
+            # Get best value and check for conflicts in one pass
+            value, conflict = consolidate_field(field, group_listings)
             if value is not None:
                 consolidated_data[field] = value
-            
-            # Check for conflicts
-            conflict = self.data_consolidator.detect_conflicts(field, group_listings)
             if conflict:
                 conflicts.append(conflict)
         
@@ -603,15 +1283,15 @@ class CentralProcessingNode:
         
         # Classify property
         classification, discard_reason, discard_details = self.property_classifier.classify_property(
-            consolidated_data
+            consolidated_data, now
         )
         
         # Create source listings summary
         source_listings = [
             {
-                'platform': l['source_platform'],
-                'listing_id': l['listing_id'],
-                'extracted': l['extraction_timestamp'].isoformat()
+                'platform': l.source_platform,
+                'listing_id': l.listing_id_native,
+                'extracted': l.extraction_timestamp.isoformat()
             }
             for l in group_listings
         ]
@@ -624,10 +1304,11 @@ class CentralProcessingNode:
             consolidated_data=consolidated_data,
             source_listings=source_listings,
             conflicts=conflicts,
+            conflict_fields=[conflict['field'] for conflict in conflicts],
             classification=classification,
             discard_reason=discard_reason,
             discard_details=discard_details,
-            last_updated=datetime.utcnow()
+            last_updated=now or datetime.now(timezone.utc)
         )
 
 
@@ -98,11 +98,24 @@ class ZillowAgentConfig:
     
     # Rate limiting
     MAX_REQUESTS_PER_MINUTE: int = 60
+    BURST_SIZE: int = 10  # requests that may start at once before the rate applies
     DELAY_BETWEEN_REQUESTS: float = 1.0  # seconds
     
-    # Retry configuration
-    MAX_RETRIES: int = 3
-    RETRY_DELAY: float = 5.0  # seconds
+    # Adaptive (AIMD) concurrency for page requests
+    INITIAL_CONCURRENCY: int = 4
+    MIN_CONCURRENCY: int = 1
+    MAX_CONCURRENCY: int = 16
+    TARGET_LATENCY: float = 2.0  # seconds; slower responses stop growth
+    MAX_PAGES_IN_FLIGHT: int = 16  # pages an iter_listings stream requests ahead
+    
+    # Retry configuration (throttled and transient failures)
+    MAX_RETRIES: int = 7  # retries after the first attempt
+    RETRY_DELAY: float = 0.5  # seconds; base of the exponential backoff
+    RETRY_MAX_DELAY: float = 60.0  # seconds; backoff cap
+    
+    # HTTP client
+    REQUEST_TIMEOUT: float = 30.0  # seconds; read/write/pool
+    CONNECT_TIMEOUT: float = 3.0  # seconds
     
     # Data extraction settings
     EXTRACT_ALL_FIELDS: bool = True
@@ -118,6 +131,9 @@ class CacheConfig:
     SEMI_MUTABLE_CACHE_DAYS: int = 90  # 3 months
     VOLATILE_CACHE_DAYS: int = 1  # 1 day
     
+    # Parsed API search pages kept in memory per agent
+    RESPONSE_CACHE_SIZE: int = 256
+    
     # Cache invalidation triggers
     INVALIDATE_ON_PRICE_CHANGE: bool = True
     INVALIDATE_ON_STATUS_CHANGE: bool = True
@@ -7,42 +7,71 @@ This script demonstrates:
 3. Classifying properties
 4. Saving results
 """
-import json
-from datetime import datetime
+import re
+from collections import Counter
+from pydantic import TypeAdapter
 from zillow_agent import ZillowAgent
 from central_processing import CentralProcessingNode
 from models import ConsolidatedProperty
 
 
-def save_consolidated_properties(properties: list, filename: str):
-    """Save consolidated properties to JSON file."""
-    properties_dict = []
-    
-    for prop in properties:
-        prop_dict = prop.model_dump()
-        # Convert datetime objects
-        if isinstance(prop_dict.get('last_updated'), datetime):
-            prop_dict['last_updated'] = prop_dict['last_updated'].isoformat()
-        
-        # Convert source listings timestamps
-        for source in prop_dict.get('source_listings', []):
-            if 'extracted' in source and isinstance(source['extracted'], datetime):
-                source['extracted'] = source['extracted'].isoformat()
-        
-        properties_dict.append(prop_dict)
-    
-    with open(filename, 'w') as f:
-        json.dump(properties_dict, f, indent=2)
+# Serializes one property straight to JSON bytes in pydantic-core
+_PROPERTY_ADAPTER = TypeAdapter(ConsolidatedProperty)
+
+# Strips currency symbols and separators from price strings
+_PRICE_RE = re.compile(r'[^\d.]')
+
+
+def save_consolidated_properties(properties: list, filename: str, pretty: bool = False):
+    """
+    Save consolidated properties to JSON file.
+    
+    Properties are written one at a time, so the full document is never
+    held in memory.
+    
+    Args:
+        properties: Consolidated properties to save
+        filename: Output file path
+        pretty: Whether to indent each property
+    """
+    indent = 2 if pretty else None
+    separator = b',\n' if pretty else b','
+    
+    dump_json = _PROPERTY_ADAPTER.dump_json
+    
+    with open(filename, 'wb') as f:
+        write = f.write
+        write(b'[')
+        for i, prop in enumerate(properties):
+            if i:
+                write(separator)
+            write(dump_json(prop, indent=indent))
+        write(b']')
     
     print(f"\nSaved {len(properties)} consolidated properties to {filename}")
 
 
 def print_summary(properties: list):
     """Print summary statistics of processed properties."""
+    # Gather every statistic in a single pass over the properties
+    classifications = Counter()
+    discard_reasons = Counter()
+    conflict_fields = Counter()
+    total_conflicts = 0
+    
+    for prop in properties:
+        classification = prop.classification
+        classifications[classification] += 1
+        if classification == 'discarded' and prop.discard_reason:
+            discard_reasons[prop.discard_reason] += 1
+        
+        total_conflicts += len(prop.conflicts)
+        conflict_fields.update(prop.conflict_fields)
+    
     total = len(properties)
-    usable = sum(1 for p in properties if p.classification == 'usable')
-    flagged = sum(1 for p in properties if p.classification == 'flagged')
-    discarded = sum(1 for p in properties if p.classification == 'discarded')
+    usable = classifications['usable']
+    flagged = classifications['flagged']
+    discarded = classifications['discarded']
     
     print("\n" + "="*60)
     print("PROCESSING SUMMARY")
@@ -56,29 +85,16 @@ def print_summary(properties: list):
     # Print discard reasons
     if discarded > 0:
         print("\nDiscard Reasons:")
-        discard_reasons = {}
-        for prop in properties:
-            if prop.classification == 'discarded' and prop.discard_reason:
-                reason = prop.discard_reason
-                discard_reasons[reason] = discard_reasons.get(reason, 0) + 1
-        
         for reason, count in discard_reasons.items():
             print(f"  - {reason}: {count}")
     
     # Print conflicts summary
-    total_conflicts = sum(len(p.conflicts) for p in properties)
     if total_conflicts > 0:
         print(f"\nTotal Conflicts Detected: {total_conflicts}")
         
         # Most common conflict fields
-        conflict_fields = {}
-        for prop in properties:
-            for conflict in prop.conflicts:
-                field = conflict.get('field')
-                conflict_fields[field] = conflict_fields.get(field, 0) + 1
-        
         print("Most Common Conflict Fields:")
-        for field, count in sorted(conflict_fields.items(), key=lambda x: x[1], reverse=True)[:5]:
+        for field, count in conflict_fields.most_common(5):
             print(f"  - {field}: {count}")
 
 
@@ -92,21 +108,21 @@ def print_sample_properties(properties: list, max_samples: int = 3):
     
     for i, prop in enumerate(usable_props[:max_samples], 1):
         print(f"\n{i}. Property ID: {prop.property_id}")
+        data = prop.consolidated_data
         
         # Get address - handle both formats
-        address = prop.consolidated_data.get('address') or prop.consolidated_data.get('address_full', 'N/A')
+        address = data.get('address') or data.get('address_full', 'N/A')
         print(f"   Address: {address}")
         
         # Get price - handle both formats
-        price = prop.consolidated_data.get('unformattedPrice') or prop.consolidated_data.get('price', 0)
+        price = data.get('unformattedPrice') or data.get('price', 0)
         if isinstance(price, str):
-            import re
-            price = re.sub(r'[^\d.]', '', price)
+            price = _PRICE_RE.sub('', price)
             price = float(price) if price else 0
         print(f"   Price: ${float(price):,.0f}")
         
-        print(f"   Beds/Baths: {prop.consolidated_data.get('beds', 'N/A')}/{prop.consolidated_data.get('baths', 'N/A')}")
-        print(f"   Area: {prop.consolidated_data.get('area', 'N/A')} sq ft")
+        print(f"   Beds/Baths: {data.get('beds', 'N/A')}/{data.get('baths', 'N/A')}")
+        print(f"   Area: {data.get('area', 'N/A')} sq ft")
         
         if prop.conflicts:
             print(f"   Conflicts: {len(prop.conflicts)}")
@@ -133,28 +149,31 @@ def main():
     print("\n3. Extracting listings from Zillow...")
     print("   Location: London, UK")
     
-    raw_listings = zillow_agent.extract_listings(
-        location="london",
-    )
+    # Raw listings are streamed to disk as they are extracted
+    with zillow_agent:
+        raw_listings = zillow_agent.extract_listings(
+            location="london",
+            output_file="data/raw_listings_zillow.jsonl"
+        )
     
     print(f"\n   Extracted {len(raw_listings)} raw listings")
+    if zillow_agent.page_errors:
+        print(f"   {len(zillow_agent.page_errors)} page(s) failed: " + ", ".join(
+            f"page {e.page} ({e.kind})" for e in zillow_agent.page_errors
+        ))
     
     if not raw_listings:
         print("\n   No listings found. Exiting.")
         return
     
-    # Save raw listings
-    print("\n4. Saving raw listings...")
-    zillow_agent.save_listings(raw_listings, "data/raw_listings_zillow.json")
-    
     # Process listings
-    print("\n5. Processing and normalizing listings...")
+    print("\n4. Processing and normalizing listings...")
     consolidated_properties = processor.process_listings(raw_listings)
     
     print(f"   Created {len(consolidated_properties)} consolidated property records")
     
     # Save consolidated properties
-    print("\n6. Saving consolidated properties...")
+    print("\n5. Saving consolidated properties...")
     save_consolidated_properties(
         consolidated_properties,
         "data/consolidated_properties.json"
@@ -170,7 +189,7 @@ def main():
     print("PROCESSING COMPLETE")
     print("="*60)
     print("\nOutput files:")
-    print("  - data/raw_listings_zillow.json")
+    print("  - data/raw_listings_zillow.jsonl")
     print("  - data/consolidated_properties.json")
 
 
@@ -72,6 +72,15 @@ class ZillowAPIResponse(BaseModel):
     results: List[ZillowListing] = Field(default_factory=list)  # API uses 'results' not 'data'
 
 
+class PageError(BaseModel):
+    """A search page that could not be extracted."""
+    page: int
+    location: Optional[str] = None
+    status: Optional[int] = None  # HTTP status, if the server answered
+    kind: str  # 'rate_limited', 'server', 'http', 'timeout', 'connection', 'decode', 'validation', 'error'
+    detail: str
+
+
 class RawListingRecord(BaseModel):
     """Standardized raw listing record from any platform."""
     source_platform: str
@@ -87,6 +96,7 @@ class ConsolidatedProperty(BaseModel):
     consolidated_data: Dict[str, Any]
     source_listings: List[Dict[str, Any]]
     conflicts: List[Dict[str, Any]] = Field(default_factory=list)
+    conflict_fields: List[str] = Field(default_factory=list)  # 'field' of each conflict, in order
     classification: str  # 'usable', 'flagged', 'discarded'
     discard_reason: Optional[str] = None
     discard_details: Optional[Dict[str, Any]] = None
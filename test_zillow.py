@@ -3,8 +3,19 @@ Test script for Zillow Agent functionality.
 
 Run this to verify your API key is working and test basic functionality.
 """
-from zillow_agent import ZillowAgent
-from central_processing import AddressNormalizer, PropertyMatcher
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from config import ZillowAgentConfig
+from zillow_agent import TokenBucket, ZillowAgent
+from central_processing import AddressNormalizer, PropertyMatcher, CentralProcessingNode
+from models import RawListingRecord
 
 
 def test_api_connection():
@@ -116,6 +127,156 @@ def test_property_matching():
         return False
 
 
+def test_different_street_no_match():
+    """Test that the same house number on a different street is not a match."""
+    print("\nTesting different-street rejection...")
+    
+    listing1 = {
+        "address": "123 Main St, Seattle, WA 98101",
+        "homeType": "SINGLE_FAMILY",
+        "price": 1000000,
+        "area": 2000
+    }
+    
+    listing2 = {
+        "address": "123 Oak St, Seattle, WA 98101",
+        "homeType": "SINGLE_FAMILY",
+        "price": 1000000,
+        "area": 2000
+    }
+    
+    is_match, score = PropertyMatcher.is_match(listing1, listing2)
+    batch_match = bool(PropertyMatcher.is_match_batch([(listing1, listing2)])[0])
+    
+    print(f"  Match score: {score:.2f}")
+    print(f"  Is match: {is_match} (batch: {batch_match})")
+    
+    if not is_match and not batch_match:
+        print(f"  ✓ Different streets kept apart")
+        return True
+    else:
+        print(f"  ✗ Different streets matched")
+        return False
+
+
+def test_different_unit_no_match():
+    """Test that two units at the same street address are not a match."""
+    print("\nTesting different-unit rejection...")
+    
+    def unit_listing(address):
+        return {
+            "address": address,
+            "homeType": "CONDO",
+            "price": 450000,
+            "area": 900
+        }
+    
+    # The unit inside the street part, and as its own address part
+    pairs = [
+        (unit_listing("55 SW 1st Blvd Apt 5, Portland, OR 97201"),
+         unit_listing("55 SW 1st Blvd Apt 7, Portland, OR 97201")),
+        (unit_listing("55 SW 1st Blvd, Apt 5, Portland, OR 97201"),
+         unit_listing("55 SW 1st Blvd, Suite 7, Portland, OR 97201"))
+    ]
+    
+    scores = [PropertyMatcher.is_match(l1, l2)[1] for l1, l2 in pairs]
+    batch_matches = PropertyMatcher.is_match_batch(pairs)
+    
+    print(f"  Match scores: {', '.join(f'{score:.2f}' for score in scores)}")
+    print(f"  Batch matches: {batch_matches.tolist()}")
+    
+    if all(score < 0.70 for score in scores) and not batch_matches.any():
+        print(f"  ✓ Different units kept apart")
+        return True
+    else:
+        print(f"  ✗ Different units matched")
+        return False
+
+
+def test_transitive_grouping():
+    """Test that chained matches are grouped together."""
+    print("\nTesting transitive grouping...")
+    
+    # A matches B and B matches C on size, but A and C are too far apart.
+    # Each record has its own ZIP, so no two share a (ZIP, address)
+    # signature and only the pairwise scores can link them.
+    # A carries a naive timestamp, as records from older output files do
+    records = [
+        RawListingRecord(
+            source_platform="zillow",
+            extraction_timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc if i else None),
+            listing_id_native=str(i),
+            raw_fields={
+                "address_full": f"123 Main St, Seattle, WA {zip_code}",
+                "address_city": "Seattle",
+                "address_state": "WA",
+                "address_zip": zip_code,
+                "homeType": "SINGLE_FAMILY",
+                "price": 1000000,
+                "area": area
+            },
+            metadata={}
+        )
+        for i, (zip_code, area) in enumerate([("98101", 2000), ("98102", 2200), ("98103", 2420)])
+    ]
+    fields = [record.raw_fields for record in records]
+    chained = (
+        PropertyMatcher.is_match(fields[0], fields[1])[0]
+        and PropertyMatcher.is_match(fields[1], fields[2])[0]
+        and not PropertyMatcher.is_match(fields[0], fields[2])[0]
+    )
+    
+    properties = CentralProcessingNode().process_listings(records)
+    
+    print(f"  Properties: {len(properties)} (A~B, B~C, A!~C: {chained})")
+    
+    if chained and len(properties) == 1 and len(properties[0].source_listings) == 3:
+        print(f"  ✓ Chained listings grouped into one property")
+        return True
+    else:
+        print(f"  ✗ Expected 1 property with 3 listings")
+        return False
+
+
+def test_partial_location_grouping():
+    """Test that copies of a listing missing their city or state are still grouped."""
+    print("\nTesting grouping with partial locations...")
+    
+    # The same house three times: complete, without a city, and without a state
+    locations = [
+        {"address_full": "123 Main St, Seattle, WA 98101", "address_city": "Seattle", "address_state": "WA"},
+        {"address_full": "123 Main St", "address_state": "WA"},
+        {"address_full": "123 Main St", "address_city": "Seattle"}
+    ]
+    records = [
+        RawListingRecord(
+            source_platform="zillow",
+            extraction_timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            listing_id_native=str(i),
+            raw_fields={
+                **location,
+                "address_zip": "98101",
+                "homeType": "SINGLE_FAMILY",
+                "price": 1000000,
+                "area": 2000
+            },
+            metadata={}
+        )
+        for i, location in enumerate(locations)
+    ]
+    
+    properties = CentralProcessingNode().process_listings(records)
+    
+    print(f"  Properties: {len(properties)}")
+    
+    if len(properties) == 1 and len(properties[0].source_listings) == 3:
+        print(f"  ✓ Listings missing a city or state grouped with the complete one")
+        return True
+    else:
+        print(f"  ✗ Expected 1 property with 3 listings")
+        return False
+
+
 def test_raw_listing_conversion(agent):
     """Test conversion to raw listing record."""
     print("\nTesting raw listing conversion...")
@@ -139,6 +300,303 @@ def test_raw_listing_conversion(agent):
         return False
 
 
+def _page_body(request, total_pages=2):
+    """Fake search response: one listing per page, ids '<page>-0'."""
+    page = request.url.params.get("page", "1")
+    return {
+        "success": True,
+        "totalPages": total_pages,
+        "results": [{"id": f"{page}-0", "address": {"street": f"{page} Main St"}}]
+    }
+
+
+def _mock_agent(handler):
+    """ZillowAgent whose requests are answered by handler(request) -> httpx.Response."""
+    return ZillowAgent(api_key="test", transport=httpx.MockTransport(handler))
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the search endpoint, for tests that need real connections."""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        page = parse_qs(urlparse(self.path).query).get("page", ["1"])[0]
+        body = json.dumps({
+            "success": True,
+            "totalPages": 2,
+            "results": [{"id": f"{page}-0"}]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_iter_listings_other_loop():
+    """Test that consuming iter_listings under asyncio.run leaves the agent usable."""
+    print("\nTesting iter_listings on a foreign event loop...")
+    
+    # Pooled keep-alive connections are what tie the client to a loop, so
+    # this needs a real server rather than a mocked transport
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    agent = ZillowAgent(api_key="test")
+    agent.base_url = f"http://127.0.0.1:{server.server_port}/api/search"
+    
+    async def consume(records):
+        return [record async for record in records]
+    
+    try:
+        streamed = asyncio.run(consume(agent.iter_listings("seattle-wa", max_pages=2)))
+        extracted = agent.extract_listings("newark-nj", max_pages=2)
+    finally:
+        agent.close()
+        server.shutdown()
+    
+    print(f"  Streamed: {len(streamed)}, extracted afterwards: {len(extracted)}")
+    
+    if len(streamed) == 2 and len(extracted) == 2 and not agent.page_errors:
+        print(f"  ✓ Agent keeps working after a foreign loop closes")
+        return True
+    else:
+        print(f"  ✗ Page errors: {agent.page_errors}")
+        return False
+
+
+def test_stream_window():
+    """Test that a stream keeps a bounded window of pages and does not cache them."""
+    print("\nTesting iter_listings page window...")
+    
+    in_flight = []
+    peak = []
+    
+    async def handler(request):
+        in_flight.append(request)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(request)
+        return httpx.Response(200, json=_page_body(request, total_pages=8))
+    
+    agent = _mock_agent(handler)
+    
+    async def consume(records):
+        return [record async for record in records]
+    
+    saved = ZillowAgentConfig.MAX_PAGES_IN_FLIGHT
+    ZillowAgentConfig.MAX_PAGES_IN_FLIGHT = 2
+    try:
+        streamed = asyncio.run(consume(agent.iter_listings("seattle-wa", max_pages=8)))
+    finally:
+        ZillowAgentConfig.MAX_PAGES_IN_FLIGHT = saved
+        agent.close()
+    
+    pages = [record.listing_id_native.split("-")[0] for record in streamed]
+    print(f"  Pages: {', '.join(pages)}; most in flight: {max(peak)}; cached: {len(agent._response_cache)}")
+    
+    if pages == [str(page) for page in range(1, 9)] and max(peak) <= 2 and not agent._response_cache:
+        print(f"  ✓ Stream stays within its window")
+        return True
+    else:
+        print(f"  ✗ Expected pages 1-8 in order, at most 2 in flight, nothing cached")
+        return False
+
+
+def test_concurrent_stream_errors():
+    """Test that concurrent iter_listings streams keep their own page errors."""
+    print("\nTesting page errors of concurrent streams...")
+    
+    def handler(request):
+        # Every newark page after the first is missing
+        if request.url.params["location"] == "newark-nj" and request.url.params["page"] != "1":
+            return httpx.Response(404)
+        return httpx.Response(200, json=_page_body(request, total_pages=3))
+    
+    agent = _mock_agent(handler)
+    
+    async def consume(records):
+        return [record async for record in records]
+    
+    async def consume_both():
+        streams = [agent.iter_listings(location, max_pages=3) for location in ("seattle-wa", "newark-nj")]
+        await asyncio.gather(*[consume(stream) for stream in streams])
+        return streams
+    
+    seattle, newark = asyncio.run(consume_both())
+    agent.close()
+    
+    failed = sorted((e.location, e.page) for e in newark.page_errors)
+    print(f"  Seattle errors: {len(seattle.page_errors)}, Newark errors: {failed}")
+    
+    if not seattle.page_errors and failed == [("newark-nj", 2), ("newark-nj", 3)]:
+        print(f"  ✓ Each stream records only its own failures")
+        return True
+    else:
+        print(f"  ✗ Expected Newark pages 2 and 3 to fail, and only them")
+        return False
+
+
+def test_token_bucket_recovery():
+    """Test that the token bucket recovers its rate, refunds cancelled waits and rejects a zero rate."""
+    print("\nTesting token bucket recovery...")
+    
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    low = {"x-ratelimit-requests-remaining": "5", "x-ratelimit-requests-limit": "100"}
+    high = {"x-ratelimit-requests-remaining": "50", "x-ratelimit-requests-limit": "100"}
+    bucket.update_from_headers(low)
+    tightened = bucket.rate < 1.0
+    bucket.update_from_headers(high)
+    restored = bucket.rate == 1.0 and bucket.capacity == 2
+    
+    async def cancel_waiter():
+        bucket = TokenBucket(rate=10.0, capacity=1)
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        # Only the first token is spent; the cancelled reservation is returned
+        return bucket._tokens > -0.5
+    
+    refunded = asyncio.run(cancel_waiter())
+    
+    try:
+        TokenBucket(rate=0.0, capacity=1)
+        rejected = False
+    except ValueError:
+        rejected = True
+    print(f"  Tightened: {tightened}, restored: {restored}, refunded: {refunded}, zero rate rejected: {rejected}")
+    
+    if tightened and restored and refunded and rejected:
+        print(f"  ✓ Rate recovers with the quota and cancelled waits are refunded")
+        return True
+    else:
+        print(f"  ✗ Rate {bucket.rate}, capacity {bucket.capacity}")
+        return False
+
+
+def _fast_retries(test):
+    """Run test() with millisecond retry backoff."""
+    saved = ZillowAgentConfig.RETRY_DELAY
+    ZillowAgentConfig.RETRY_DELAY = 0.001
+    try:
+        return test()
+    finally:
+        ZillowAgentConfig.RETRY_DELAY = saved
+
+
+def test_retry_backoff():
+    """Test that transient errors are retried and over-long Retry-After fails fast."""
+    print("\nTesting retry with backoff...")
+    
+    calls = []
+    
+    def flaky(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json=_page_body(request, total_pages=1))
+    
+    agent = _mock_agent(flaky)
+    response = _fast_retries(lambda: agent.search_listings("seattle-wa"))
+    agent.close()
+    retried = len(calls) == 3 and len(response.results) == 1
+    
+    # A server asking to wait an hour is not waited out
+    calls.clear()
+    
+    def throttled(request):
+        calls.append(request)
+        return httpx.Response(429, headers={"Retry-After": "3600"})
+    
+    agent = _mock_agent(throttled)
+    listings = _fast_retries(lambda: agent.extract_listings("seattle-wa"))
+    agent.close()
+    gave_up = len(calls) == 1 and not listings and [e.kind for e in agent.page_errors] == ['rate_limited']
+    
+    print(f"  Retried to success: {retried}, gave up on long Retry-After: {gave_up}")
+    
+    if retried and gave_up:
+        print(f"  ✓ Retries follow the server's hints")
+        return True
+    else:
+        print(f"  ✗ Calls: {len(calls)}, page errors: {agent.page_errors}")
+        return False
+
+
+def test_rate_limit_probe():
+    """Test that after a 429 throttled pages retry one at a time through the probe."""
+    print("\nTesting rate limit probe...")
+    
+    attempts = {}
+    retries_started = []
+    retries_done = []
+    
+    async def handler(request):
+        page = request.url.params["page"]
+        attempts[page] = attempts.get(page, 0) + 1
+        retry = attempts[page] > 1
+        if retry:
+            # Which retries were already running when this one started
+            retries_started.append(len(retries_done))
+        await asyncio.sleep(0.01)
+        if page != "1" and not retry:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if retry:
+            retries_done.append(page)
+        return httpx.Response(200, json=_page_body(request, total_pages=4))
+    
+    agent = _mock_agent(handler)
+    # Keep the concurrency limit from serializing the retries on its own
+    agent._limiter.minimum = 4
+    listings = _fast_retries(lambda: agent.extract_listings("seattle-wa", max_pages=4))
+    agent.close()
+    
+    # Only the probe may start before any retry has finished
+    probed = retries_started.count(0) == 1
+    print(f"  Listings: {len(listings)}, retries started before the probe finished: {retries_started.count(0)}")
+    
+    if len(listings) == 4 and probed and not agent.page_errors:
+        print(f"  ✓ Throttled pages recover through a single probe")
+        return True
+    else:
+        print(f"  ✗ Attempts: {attempts}, page errors: {agent.page_errors}")
+        return False
+
+
+def test_etag_revalidation():
+    """Test that an expired cached page is revalidated and reused on 304."""
+    print("\nTesting ETag revalidation...")
+    
+    sent_etags = []
+    
+    def handler(request):
+        sent_etags.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=_page_body(request, total_pages=1), headers={"ETag": '"v1"'})
+    
+    agent = _mock_agent(handler)
+    # Expire cached pages immediately so the second search revalidates
+    agent._response_cache_ttl = 0
+    first = agent.search_listings("seattle-wa")
+    second = agent.search_listings("seattle-wa")
+    agent.close()
+    
+    print(f"  If-None-Match sent: {sent_etags}")
+    
+    if sent_etags == [None, '"v1"'] and second is first:
+        print(f"  ✓ 304 reuses the cached page")
+        return True
+    else:
+        print(f"  ✗ Expected a conditional request answered from cache")
+        return False
+
+
 def main():
     """Run all tests."""
     print("="*60)
@@ -160,6 +618,19 @@ def main():
     # Test processing functions
     results['Address Normalization'] = test_address_normalization()
     results['Property Matching'] = test_property_matching()
+    results['Different Street'] = test_different_street_no_match()
+    results['Different Unit'] = test_different_unit_no_match()
+    results['Transitive Grouping'] = test_transitive_grouping()
+    results['Partial Location Grouping'] = test_partial_location_grouping()
+    
+    # Test agent behaviour against local and mocked servers
+    results['Iter Listings Foreign Loop'] = test_iter_listings_other_loop()
+    results['Stream Window'] = test_stream_window()
+    results['Concurrent Stream Errors'] = test_concurrent_stream_errors()
+    results['Token Bucket Recovery'] = test_token_bucket_recovery()
+    results['Retry Backoff'] = test_retry_backoff()
+    results['Rate Limit Probe'] = test_rate_limit_probe()
+    results['ETag Revalidation'] = test_etag_revalidation()
     
     # Print summary
     print("\n" + "="*60)
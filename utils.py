@@ -1,13 +1,31 @@
 """
 Utility functions for the CRE Agent system.
 """
-import os
 import json
+import os
+import re
+import orjson
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 
 
+# Patterns used by the string helpers, compiled once at import
+_NUM_RE = re.compile(r'-?\d+\.?\d*')
+_WS_RE = re.compile(r'\s+')
+
+# Digit runs long enough to be an integer outside orjson's 64-bit range
+_LONG_DIGITS_RE = re.compile(rb'\d{19}')
+
+# Directories already created by ensure_directory_exists in this process
+_DIRS_CREATED = set()
+
+# Sentinel for keys missing from a dict, distinct from a stored None
+_MISSING = object()
+
+
 def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
     """
     Set up logging for the application.
@@ -46,10 +64,16 @@ def ensure_directory_exists(directory: str) -> None:
     """
     Ensure a directory exists, creating it if necessary.
     
+    Each directory is only checked once per process. An empty path (the
+    current directory) is a no-op.
+    
     Args:
         directory: Directory path to check/create
     """
+    if not directory or directory in _DIRS_CREATED:
+        return
     os.makedirs(directory, exist_ok=True)
+    _DIRS_CREATED.add(directory)
 
 
 def save_json(data: Any, filepath: str, pretty: bool = True) -> None:
@@ -63,11 +87,19 @@ def save_json(data: Any, filepath: str, pretty: bool = True) -> None:
     """
     ensure_directory_exists(os.path.dirname(filepath))
     
-    with open(filepath, 'w') as f:
-        if pretty:
-            json.dump(data, f, indent=2, default=str)
-        else:
-            json.dump(data, f, default=str)
+    # Accept the same input the stdlib encoder did: non-string keys and
+    # numpy values are encoded natively, anything else unknown goes to str
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    try:
+        payload = orjson.dumps(data, default=str, option=option)
+    except TypeError:
+        # orjson rejects some values json accepts, e.g. ints wider than 64 bits
+        payload = json.dumps(data, indent=2 if pretty else None, default=str).encode()
+    
+    with open(filepath, 'wb') as f:
+        f.write(payload)
 
 
 def load_json(filepath: str) -> Any:
@@ -80,8 +112,20 @@ def load_json(filepath: str) -> Any:
     Returns:
         Loaded data
     """
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    # Read raw bytes in one go; orjson decodes UTF-8 itself
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    
+    # Files written by json (save_json's fallback, or older versions) may
+    # hold NaN/Infinity, which orjson rejects, or integers too wide for 64
+    # bits, which orjson would silently turn into floats; json reads both
+    # losslessly. Any 19+ digit run counts as a possible wide integer.
+    if _LONG_DIGITS_RE.search(data):
+        return json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
 
 
 def format_currency(amount: Optional[float], currency: str = 'USD') -> str:
@@ -99,9 +143,9 @@ def format_currency(amount: Optional[float], currency: str = 'USD') -> str:
         return 'N/A'
     
     if currency == 'USD':
-        return f'${amount:,.0f}'
+        return f'${_format_whole(amount)}'
     else:
-        return f'{amount:,.0f} {currency}'
+        return f'{_format_whole(amount)} {currency}'
 
 
 def format_area(sqft: Optional[float]) -> str:
@@ -116,7 +160,25 @@ def format_area(sqft: Optional[float]) -> str:
     """
     if sqft is None:
         return 'N/A'
-    return f'{sqft:,.0f} sq ft'
+    return f'{_format_whole(sqft)} sq ft'
+
+
+def _format_whole(value: float) -> str:
+    """
+    Format a number with thousands separators and no decimals.
+    
+    Whole numbers (the usual case for prices and areas) go through a cached
+    formatter; everything else, including -0.0, is formatted directly.
+    """
+    if type(value) is int or (type(value) is float and value.is_integer() and value):
+        return _format_int(int(value))
+    return f'{value:,.0f}'
+
+
+@lru_cache(maxsize=4096)
+def _format_int(value: int) -> str:
+    """Memoized f'{value:,.0f}' for integers."""
+    return f'{value:,.0f}'
 
 
 def format_percentage(value: Optional[float], decimals: int = 1) -> str:
@@ -256,9 +318,7 @@ def extract_numbers_from_string(text: str) -> List[float]:
     Returns:
         List of numbers found in the text
     """
-    import re
-    pattern = r'-?\d+\.?\d*'
-    matches = re.findall(pattern, text)
+    matches = _NUM_RE.findall(text)
     return [float(m) for m in matches]
 
 
@@ -276,8 +336,7 @@ def clean_string(text: Optional[str]) -> str:
         return ''
     
     # Remove extra whitespace
-    import re
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = _WS_RE.sub(' ', text.strip())
     
     return text
 
@@ -300,18 +359,23 @@ def truncate_string(text: str, max_length: int = 100, suffix: str = '...') -> st
     return text[:max_length - len(suffix)] + suffix
 
 
-def batch_list(items: List[Any], batch_size: int) -> List[List[Any]]:
+def batch_list(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
     """
-    Split a list into batches.
+    Split items into batches, lazily.
     
     Args:
-        items: List to batch
+        items: Iterable to batch
         batch_size: Size of each batch
         
-    Returns:
-        List of batches
+    Yields:
+        Lists of up to batch_size items
     """
-    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
 
 
 def merge_dicts(dict1: Dict, dict2: Dict, prefer_dict2: bool = True) -> Dict:
@@ -328,11 +392,19 @@ def merge_dicts(dict1: Dict, dict2: Dict, prefer_dict2: bool = True) -> Dict:
     """
     result = dict1.copy()
     
-    for key, value in dict2.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = merge_dicts(result[key], value, prefer_dict2)
-        elif prefer_dict2 or key not in result:
-            result[key] = value
+    # Walk nested dicts with an explicit stack; only dicts on merged paths are
+    # copied, so neither input is modified
+    stack = [(result, dict2)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            existing = target.get(key)
+            if isinstance(existing, dict) and isinstance(value, dict):
+                merged = existing.copy()
+                target[key] = merged
+                stack.append((merged, value))
+            elif prefer_dict2 or key not in target:
+                target[key] = value
     
     return result
 
@@ -349,18 +421,25 @@ def get_nested_value(data: Dict, key_path: str, default: Any = None) -> Any:
     Returns:
         Value at the key path, or default
     """
-    keys = key_path.split('.')
     value = data
     
-    for key in keys:
-        if isinstance(value, dict) and key in value:
-            value = value[key]
-        else:
+    for key in _split_path(key_path):
+        if not isinstance(value, dict):
+            return default
+        # One lookup per level; get() never triggers a defaultdict factory
+        value = value.get(key, _MISSING)
+        if value is _MISSING:
             return default
     
     return value
 
 
+@lru_cache(maxsize=512)
+def _split_path(key_path: str) -> Tuple[str, ...]:
+    """Split a dot-separated key path, memoized for paths used repeatedly."""
+    return tuple(key_path.split('.'))
+
+
 def calculate_variance(value1: float, value2: float) -> float:
     """
     Calculate percentage variance between two values.
@@ -389,6 +468,7 @@ class ProgressTracker:
         self.total = total
         self.current = 0
         self.description = description
+        self._last_filled = -1
     
     def update(self, increment: int = 1) -> None:
         """Update progress."""
@@ -396,10 +476,14 @@ class ProgressTracker:
         self._print_progress()
     
     def _print_progress(self) -> None:
-        """Print current progress."""
-        percentage = (self.current / self.total * 100) if self.total > 0 else 0
+        """Print current progress, redrawing only when the bar itself moves."""
         bar_length = 40
         filled = int(bar_length * self.current / self.total) if self.total > 0 else 0
+        if filled == self._last_filled and self.current < self.total:
+            return
+        self._last_filled = filled
+        
+        percentage = (self.current / self.total * 100) if self.total > 0 else 0
         bar = '=' * filled + '-' * (bar_length - filled)
         
         print(f'\r{self.description}: [{bar}] {percentage:.1f}% ({self.current}/{self.total})', end='')
@@ -4,18 +4,429 @@ Zillow Agent - Site-specific listing agent for Zillow platform.
 This agent collects raw listing data from Zillow using the RapidAPI Zillow scraper.
 Preserves platform-native fields without interpretation or validation.
 """
+import asyncio
+import hashlib
+import inspect
+import logging
 import os
-import requests
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+import random
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+import httpx
+import orjson
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator, Iterable
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
-from models import ZillowAPIResponse, ZillowListing, RawListingRecord
+from config import CacheConfig, ZillowAgentConfig
+from models import ZillowAPIResponse, ZillowListing, RawListingRecord, PageError
 
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+_UTC = timezone.utc
+
+
+def _retry_after_seconds(headers) -> Optional[float]:
+    """
+    Get how long the server asked us to wait before retrying.
+    
+    Reads Retry-After (seconds or an HTTP date), falling back to
+    X-RateLimit-Reset (seconds, or a Unix timestamp).
+    
+    Returns:
+        Seconds to wait, or None if the server gave no usable hint
+    """
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                retry_at = None
+            if retry_at is not None:
+                return max(0.0, retry_at.timestamp() - time.time())
+    
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        # Large values are absolute epoch times rather than a delay
+        if reset > 1_000_000_000:
+            reset -= time.time()
+        return max(0.0, reset)
+    
+    return None
+
+
+def _page_error(page: int, exc: BaseException, location: Optional[str] = None) -> PageError:
+    """
+    Classify a failed page fetch so callers can tell throttling, server
+    faults and bad payloads apart.
+    
+    Args:
+        page: Page number that failed
+        exc: Exception raised while fetching or parsing the page
+        location: Location the page belongs to
+        
+    Returns:
+        PageError describing the failure
+    """
+    status = None
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if status == 429:
+            kind = 'rate_limited'
+        elif status >= 500:
+            kind = 'server'
+        else:
+            kind = 'http'
+    elif isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError)):
+        kind = 'timeout'
+    elif isinstance(exc, httpx.RequestError):
+        kind = 'connection'
+    elif isinstance(exc, orjson.JSONDecodeError):
+        kind = 'decode'
+    elif isinstance(exc, ValidationError):
+        kind = 'validation'
+    else:
+        kind = 'error'
+    
+    # httpx appends a documentation link on a second line; keep the message
+    detail = str(exc).partition('\n')[0] or type(exc).__name__
+    return PageError(page=page, location=location, status=status, kind=kind, detail=detail)
+
+
+_BOOL_STR = {True: "true", False: "false"}
+
+
+def _param_spec(search, overrides: Dict[str, str]) -> Dict[str, Tuple[str, bool]]:
+    """
+    Derive the optional search filters from the search method's signature.
+    
+    Args:
+        search: Function whose keyword arguments (after location) are filters
+        overrides: Query-string names that differ from the camelCased argument
+        
+    Returns:
+        Dict of argument name -> (query-string name, is bool filter)
+    """
+    spec = {}
+    for param in list(inspect.signature(search).parameters.values())[2:]:
+        head, *rest = param.name.split('_')
+        key = overrides.get(param.name, head + ''.join(word.title() for word in rest))
+        spec[param.name] = (key, param.annotation == Optional[bool])
+    return spec
+
+
+def _write_record(f, record: RawListingRecord) -> None:
+    """Append one raw listing record to an open binary file as an NDJSON line."""
+    # The record fields are already JSON-ready (orjson encodes datetimes as
+    # ISO 8601 natively), so its __dict__ is dumped as-is; default=str
+    # mirrors utils.save_json for anything else
+    f.write(orjson.dumps(record.__dict__, default=str, option=orjson.OPT_APPEND_NEWLINE))
+
+
+def _cache_key(querystring: Dict[str, str]) -> str:
+    """Stable cache key for a search query string."""
+    return hashlib.sha1(orjson.dumps(querystring, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class ListingStream:
+    """
+    Async iterator over the raw listing records of one iter_listings call.
+    
+    Pages that fail are recorded in page_errors as the stream reaches them,
+    so concurrent streams keep their failures apart.
+    """
+    
+    def __init__(self, records: AsyncIterator[RawListingRecord], page_errors: List[PageError]):
+        """
+        Initialize the stream.
+        
+        Args:
+            records: Async generator producing the records
+            page_errors: List the generator appends failed pages to
+        """
+        self._records = records
+        self.page_errors = page_errors
+    
+    def __aiter__(self) -> "ListingStream":
+        return self
+    
+    async def __anext__(self) -> RawListingRecord:
+        return await self._records.__anext__()
+    
+    async def aclose(self) -> None:
+        """Stop the stream, cancelling any pages still being fetched."""
+        await self._records.aclose()
+
+
+class TokenBucket:
+    """
+    Proactive, burst-tolerant request rate limit.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one. A full bucket lets a burst of `capacity` requests
+    start at once, after which requests settle to `rate`. When the bucket
+    is empty a caller reserves the next token (the balance goes negative)
+    and sleeps until it is due, so waiters are served in arrival order
+    rather than racing for each refill. The rate tightens when the API
+    reports that little quota is left, and returns to the configured one
+    once the quota has recovered.
+    """
+    
+    # Headers RapidAPI gateways use to report remaining quota
+    REMAINING_HEADERS = ("x-ratelimit-requests-remaining", "x-ratelimit-remaining-requests")
+    LIMIT_HEADERS = ("x-ratelimit-requests-limit", "x-ratelimit-limit-requests")
+    
+    # Slowest refill acquire will wait on (one token an hour), should the
+    # rate attribute ever be set to zero
+    MIN_RATE = 1 / 3600
+    
+    def __init__(self, rate: float, capacity: int):
+        """
+        Initialize the bucket, full.
+        
+        Args:
+            rate: Tokens added per second; must be positive
+            capacity: Maximum tokens held (burst size); at least 1
+            
+        Raises:
+            ValueError: If rate or capacity is out of range
+        """
+        if not rate > 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate!r}")
+        if capacity < 1:
+            raise ValueError(f"Token bucket capacity must be at least 1, got {capacity!r}")
+        self.rate = self._configured_rate = rate
+        self.capacity = self._configured_capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+    
+    async def acquire(self) -> None:
+        """Take a token, waiting until one is available."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            try:
+                await asyncio.sleep(-self._tokens / max(self.rate, self.MIN_RATE))
+            except asyncio.CancelledError:
+                # The request will not be made; give its reservation back
+                self._tokens += 1
+                raise
+    
+    def update_from_headers(self, headers) -> None:
+        """
+        Tighten the rate when under 10% of the plan's quota remains.
+        
+        The remaining quota is spread over the next minute. Once at least
+        10% remains again, the configured rate and capacity are restored.
+        
+        Args:
+            headers: Response headers
+        """
+        remaining = _int_header(headers, self.REMAINING_HEADERS)
+        limit = _int_header(headers, self.LIMIT_HEADERS)
+        if remaining is None or not limit:
+            return
+        if remaining < 0.1 * limit:
+            self.rate = max(1 / 60, min(self.rate, remaining / 60))
+            self.capacity = max(1, min(self.capacity, remaining))
+            self._tokens = min(self._tokens, self.capacity)
+        else:
+            # Tokens refill to the restored capacity at the restored rate
+            self.rate = self._configured_rate
+            self.capacity = self._configured_capacity
+
+
+class RateLimitGate:
+    """
+    Serializes recovery once the API starts throttling.
+    
+    A 429 closes the gate: new attempts wait for it to reopen, and the
+    throttled requests retry one at a time through a single probe slot.
+    When the probe finishes (successfully or not) the gate reopens and
+    everyone resumes, instead of all throttled requests retrying at once.
+    """
+    
+    def __init__(self):
+        """Initialize an open gate."""
+        self._loop = None
+        self._open = None
+        self._probe = None
+    
+    def _bind(self) -> None:
+        # asyncio primitives belong to one loop; make fresh ones per loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._open = asyncio.Event()
+            self._open.set()
+            self._probe = asyncio.Lock()
+    
+    async def wait(self) -> None:
+        """Wait until the gate is open."""
+        self._bind()
+        await self._open.wait()
+    
+    def close(self) -> None:
+        """Close the gate after a throttled response."""
+        self._bind()
+        self._open.clear()
+    
+    async def acquire_probe(self) -> bool:
+        """
+        Wait for the probe slot.
+        
+        Returns:
+            True if the caller now holds the slot; False (slot not held) if
+            the gate reopened while waiting
+        """
+        self._bind()
+        await self._probe.acquire()
+        if self._open.is_set():
+            self._probe.release()
+            return False
+        return True
+    
+    def release_probe(self) -> None:
+        """Reopen the gate and give up the probe slot."""
+        self._open.set()
+        self._probe.release()
+
+
+def _requests_per_minute() -> float:
+    """
+    Get the request rate limit from RAPIDAPI_RPM, or the configured default.
+    
+    Raises:
+        ValueError: If RAPIDAPI_RPM is not a positive number
+    """
+    value = os.getenv('RAPIDAPI_RPM')
+    if not value:
+        return float(ZillowAgentConfig.MAX_REQUESTS_PER_MINUTE)
+    try:
+        rpm = float(value)
+    except ValueError:
+        raise ValueError(f"RAPIDAPI_RPM must be a number, got {value!r}") from None
+    if not rpm > 0:
+        raise ValueError(f"RAPIDAPI_RPM must be positive, got {value!r}")
+    return rpm
+
+
+def _int_header(headers, names) -> Optional[int]:
+    """Get the first of several integer headers that is present and valid."""
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(value)
+            except ValueError:
+                pass
+    return None
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit for API requests.
+    
+    Additive increase, multiplicative decrease: the limit grows by a fixed
+    step while recent latencies stay at or under the target, and is cut
+    when the API throttles (429), a gateway fails (502/503) or a response
+    is much slower than the target.
+    
+    Use as an async context manager around each request.
+    """
+    
+    # Statuses that mean the API is overloaded
+    BACKOFF_STATUSES = frozenset({429, 502, 503})
+    
+    def __init__(
+        self,
+        initial: int = ZillowAgentConfig.INITIAL_CONCURRENCY,
+        minimum: int = ZillowAgentConfig.MIN_CONCURRENCY,
+        maximum: int = ZillowAgentConfig.MAX_CONCURRENCY,
+        target_latency: float = ZillowAgentConfig.TARGET_LATENCY,
+        window: int = 10,
+        increase: float = 0.5,
+        decrease: float = 0.5
+    ):
+        """
+        Initialize the limiter.
+        
+        Args:
+            initial: Starting concurrency limit
+            minimum: Lowest the limit can be cut to
+            maximum: Highest the limit can grow to
+            target_latency: Mean latency (seconds) under which the limit grows
+            window: Number of recent latencies averaged
+            increase: Amount added to the limit per fast response
+            decrease: Factor the limit is multiplied by on backoff
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self._latencies = deque(maxlen=window)
+        self._in_flight = 0
+        self._condition = None
+        self._loop = None
+    
+    def _get_condition(self) -> asyncio.Condition:
+        # Each asyncio.run() call has its own loop; asyncio primitives bind
+        # to one, so make a fresh condition per loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._in_flight = 0
+        return self._condition
+    
+    async def __aenter__(self) -> "AIMDLimiter":
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            # The limit may have grown by more than one slot
+            condition.notify_all()
+    
+    def record(self, latency: float, status: Optional[int] = None) -> None:
+        """
+        Adjust the limit after a request.
+        
+        Args:
+            latency: Request duration in seconds
+            status: HTTP status, or None if no response was received
+        """
+        if status in self.BACKOFF_STATUSES or latency > 2 * self.target_latency:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self._latencies.clear()
+            return
+        
+        self._latencies.append(latency)
+        if sum(self._latencies) / len(self._latencies) <= self.target_latency:
+            self.limit = min(self.maximum, self.limit + self.increase)
+
 
 class ZillowAgent:
     """
@@ -28,13 +439,27 @@ class ZillowAgent:
     - Source provenance tagging
     """
     
-    def __init__(self, api_key: Optional[str] = None, api_host: Optional[str] = None):
+    # Statuses worth retrying: throttling and transient gateway failures
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+    
+    # Query-string names that are not the camelCase of the argument name
+    _PARAM_KEY_OVERRIDES = {"max_hoa": "maxHOA"}
+    
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_host: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         """
         Initialize Zillow agent with RapidAPI credentials.
         
         Args:
             api_key: RapidAPI key (defaults to environment variable)
             api_host: RapidAPI host (defaults to environment variable)
+            transport: Optional httpx transport for the HTTP client
+                (e.g. httpx.MockTransport in tests)
         """
         self.api_key = api_key or os.getenv('RAPIDAPI_KEY')
         self.api_host = api_host or os.getenv('RAPIDAPI_HOST', 'zillow-com-realtime-scraper.p.rapidapi.com')
@@ -42,6 +467,96 @@ class ZillowAgent:
         
         if not self.api_key:
             raise ValueError("RAPIDAPI_KEY not found in environment variables")
+        
+        self.headers = {
+            "x-rapidapi-key": self.api_key,
+            "x-rapidapi-host": self.api_host
+        }
+        
+        # Shared by every request this agent makes
+        self._limiter = AIMDLimiter()
+        # Parsed search pages: cache key -> (fetched at, ETag, response)
+        self._response_cache = OrderedDict()
+        self._response_cache_ttl = CacheConfig.VOLATILE_CACHE_DAYS * 24 * 3600
+        
+        self._rate_limit_gate = RateLimitGate()
+        self._rate_limiter = TokenBucket(_requests_per_minute() / 60, ZillowAgentConfig.BURST_SIZE)
+        
+        # One event loop and one keep-alive HTTP client for the agent's
+        # lifetime, so TCP/TLS handshakes are paid once rather than per call
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._transport = transport
+        
+        # Pages that failed during the most recent extract_listings or
+        # extract_many call; iter_listings streams keep their own
+        self.page_errors: List[PageError] = []
+    
+    def __enter__(self) -> "ZillowAgent":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close the agent's HTTP client and event loop."""
+        self._discard_client()
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.close()
+        self._loop = None
+    
+    def _discard_client(self) -> None:
+        """
+        Drop the HTTP client, closing it on its own loop when still possible.
+        
+        A client whose loop has already finished (e.g. one used by an
+        iter_listings stream under asyncio.run) cannot be closed any more;
+        its connections died with that loop.
+        """
+        client, loop = self._client, self._client_loop
+        self._client = self._client_loop = None
+        if client is None or client.is_closed or loop is None:
+            return
+        if not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(client.aclose())
+    
+    def _run(self, coro):
+        """Run a coroutine to completion on the agent's event loop."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the agent's HTTP client, creating it on first use.
+        
+        HTTP/2 is negotiated where the gateway offers it, so concurrent
+        page requests share one multiplexed connection instead of each
+        holding its own TLS session. The client's connections belong to the
+        event loop that opened them, so (like AIMDLimiter and RateLimitGate)
+        a fresh client is made when called from a different loop, e.g.
+        when iter_listings is consumed outside the agent's own loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._client_loop is not loop:
+            # The old client's connections belong to the other loop and
+            # cannot be awaited from this one; drop it
+            self._client = None
+        if self._client is None or self._client.is_closed:
+            self._client_loop = loop
+            limit = ZillowAgentConfig.MAX_CONCURRENCY
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers=self.headers,
+                transport=self._transport,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+                timeout=httpx.Timeout(
+                    ZillowAgentConfig.REQUEST_TIMEOUT, connect=ZillowAgentConfig.CONNECT_TIMEOUT
+                )
+            )
+        return self._client
     
     def search_listings(
         self,
@@ -102,62 +617,176 @@ class ZillowAgent:
         Returns:
             ZillowAPIResponse object containing listing data
         """
-        # Build query parameters
+        search_params = dict(locals())
+        del search_params['self']
+        querystring = self._build_querystring(**search_params)
+        try:
+            return self._run(self._search_listings_async(querystring))
+        except Exception as e:
+            error = _page_error(page or 1, e, location)
+            logger.error("Zillow search failed (%s): %s", error.kind, error.detail)
+            raise
+    
+    # Optional search filters, search_listings argument -> (query-string name,
+    # is bool), generated once so the signature stays the single list of filters
+    _PARAM_SPEC = _param_spec(search_listings, _PARAM_KEY_OVERRIDES)
+    _PARAM_ARGS = frozenset(_PARAM_SPEC)
+    
+    def _build_querystring(self, location: str, **search_params) -> Dict[str, str]:
+        """
+        Build the API query string for a search.
+        
+        Args:
+            location: Location to search
+            **search_params: search_listings filter arguments (None = unset)
+            
+        Returns:
+            Query parameters as strings
+        """
+        unknown = search_params.keys() - self._PARAM_ARGS
+        if unknown:
+            raise TypeError(f"Unknown search parameter(s): {', '.join(sorted(unknown))}")
+        
         querystring = {"location": location}
         
-        # Add optional parameters if provided
-        optional_params = {
-            "page": page,
-            "beds": beds,
-            "baths": baths,
-            "homeType": home_type,
-            "minPrice": min_price,
-            "maxPrice": max_price,
-            "minSqft": min_sqft,
-            "maxSqft": max_sqft,
-            "minYear": min_year,
-            "maxYear": max_year,
-            "minLotSize": min_lot_size,
-            "maxLotSize": max_lot_size,
-            "daysOnZillow": days_on_zillow,
-            "listType": list_type,
-            "maxHOA": max_hoa,
-            "openHouse": open_house,
-            "threeDTour": three_d_tour,
-            "hasPool": has_pool,
-            "waterfront": waterfront,
-            "singleStory": single_story,
-            "basement": basement,
-            "cityView": city_view,
-            "parkingSpots": parking_spots
-        }
+        # Add non-None parameters to querystring; only the arguments actually
+        # passed are visited, not every known filter
+        spec = self._PARAM_SPEC
+        for name, value in search_params.items():
+            if value is None:
+                continue
+            key, is_bool = spec[name]
+            querystring[key] = _BOOL_STR[value] if is_bool and value.__class__ is bool else str(value)
         
-        # Add non-None parameters to querystring
-        for key, value in optional_params.items():
-            if value is not None:
-                querystring[key] = str(value).lower() if isinstance(value, bool) else str(value)
+        return querystring
+    
+    async def _search_listings_async(
+        self,
+        querystring: Dict[str, str],
+        store: bool = True
+    ) -> ZillowAPIResponse:
+        """
+        Fetch and parse one search page.
         
-        # Set up headers
-        headers = {
-            "x-rapidapi-key": self.api_key,
-            "x-rapidapi-host": self.api_host
-        }
+        Parsed pages are cached per query. Within the volatile-data TTL a
+        cached page is returned without a request; after it, the page is
+        revalidated with its ETag and reused if the server answers 304.
         
-        try:
-            # Make API request
-            response = requests.get(self.base_url, headers=headers, params=querystring)
-            response.raise_for_status()
+        Args:
+            querystring: Query parameters from _build_querystring
+            store: Whether to cache the page; streams only reuse cached pages
             
-            # Parse response
-            data = response.json()
-            return ZillowAPIResponse(**data)
+        Returns:
+            ZillowAPIResponse object containing listing data
+        """
+        cache = self._response_cache
+        key = _cache_key(querystring)
+        cached = cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self._response_cache_ttl:
+            cache.move_to_end(key)
+            return cached[2]
+        
+        # Make API request, conditional on the cached ETag if there is one;
+        # failures propagate to the caller, which classifies them
+        body, etag = await self._get_with_retry(
+            querystring, cached[1] if cached is not None else None
+        )
+        
+        if body is None:
+            # 304 Not Modified: the cached page is still current
+            response = cached[2]
+            etag = etag or cached[1]
+        else:
+            # orjson.loads + model_validate measures ~1.8x faster than
+            # model_validate_json on full (100 KB) result pages
+            response = ZillowAPIResponse.model_validate(orjson.loads(body))
+        
+        if not store:
+            return response
+        cache[key] = (time.monotonic(), etag, response)
+        cache.move_to_end(key)
+        if len(cache) > CacheConfig.RESPONSE_CACHE_SIZE:
+            cache.popitem(last=False)
+        
+        return response
+    
+    async def _get_with_retry(
+        self,
+        querystring: Dict[str, str],
+        etag: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        GET a search page, retrying throttled and transient failures.
+        
+        Retries back off exponentially with full jitter, and wait at least as
+        long as the server asks via Retry-After / X-RateLimit-Reset. A
+        response asking for longer than RETRY_MAX_DELAY is raised rather
+        than waited out, as are other HTTP errors.
+        
+        Args:
+            querystring: Query parameters from _build_querystring
+            etag: ETag of a cached copy, sent as If-None-Match
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching Zillow listings: {e}")
-            raise
-        except Exception as e:
-            print(f"Error parsing Zillow response: {e}")
-            raise
+        Returns:
+            Tuple of (raw response body, ETag); the body is None if the
+            server answered 304 Not Modified
+        """
+        client = self._get_client()
+        request_headers = {"If-None-Match": etag} if etag else None
+        max_retries = ZillowAgentConfig.MAX_RETRIES
+        gate = self._rate_limit_gate
+        probing = False
+        
+        try:
+            for attempt in range(max_retries + 1):
+                # While throttled, only the probe request goes out
+                if not probing:
+                    await gate.wait()
+                await self._rate_limiter.acquire()
+                
+                retry_after = None
+                status = None
+                try:
+                    # Each attempt takes its own slot in the adaptive concurrency limit
+                    async with self._limiter:
+                        started = time.monotonic()
+                        try:
+                            response = await client.get(
+                                self.base_url, params=querystring, headers=request_headers
+                            )
+                            status = response.status_code
+                            self._rate_limiter.update_from_headers(response.headers)
+                            if status == 304:
+                                return (None, response.headers.get("ETag"))
+                            if status in self.RETRY_STATUSES:
+                                retry_after = _retry_after_seconds(response.headers)
+                            response.raise_for_status()
+                            return (response.content, response.headers.get("ETag"))
+                        finally:
+                            self._limiter.record(time.monotonic() - started, status)
+                except httpx.HTTPStatusError as e:
+                    if (
+                        e.response.status_code not in self.RETRY_STATUSES
+                        or attempt == max_retries
+                        or (retry_after or 0.0) > ZillowAgentConfig.RETRY_MAX_DELAY
+                    ):
+                        raise
+                except httpx.TransportError:
+                    if attempt == max_retries:
+                        raise
+                
+                if status == 429 and not probing:
+                    # Retry as the single probe, unless another probe already recovered
+                    gate.close()
+                    probing = await gate.acquire_probe()
+                
+                backoff = random.uniform(
+                    0, min(ZillowAgentConfig.RETRY_MAX_DELAY, ZillowAgentConfig.RETRY_DELAY * 2 ** attempt)
+                )
+                await asyncio.sleep(max(retry_after or 0.0, backoff))
+        finally:
+            if probing:
+                gate.release_probe()
     
     def convert_to_raw_listing_record(
         self,
@@ -169,31 +798,44 @@ class ZillowAgent:
         
         Args:
             listing: ZillowListing object
-            extraction_timestamp: Timestamp of extraction (defaults to now)
+            extraction_timestamp: Timestamp of extraction (defaults to now, UTC)
             
         Returns:
             RawListingRecord object
         """
         if extraction_timestamp is None:
-            extraction_timestamp = datetime.utcnow()
+            extraction_timestamp = datetime.now(_UTC)
         
-        # Convert the listing to a dict and flatten the address for easier processing
-        raw_data = listing.model_dump()
+        # Copy the validated field values straight out of the model rather
+        # than running model_dump's serializer; nested models become plain
+        # dicts, and dicts are copied so records never share state with
+        # (possibly cached) API responses
+        raw_data = dict(listing.__dict__)
+        address = listing.address
+        lat_long = listing.latLong
+        if address is not None:
+            raw_data['address'] = dict(address.__dict__)
+        if lat_long is not None:
+            raw_data['latLong'] = dict(lat_long.__dict__)
+        if listing.listingSubType is not None:
+            raw_data['listingSubType'] = dict(listing.listingSubType)
         
         # Add flattened address for easier access
-        if listing.address:
+        if address is not None:
             raw_data['address_full'] = listing.get_full_address()
-            raw_data['address_street'] = listing.address.street
-            raw_data['address_city'] = listing.address.city
-            raw_data['address_state'] = listing.address.state
-            raw_data['address_zip'] = listing.address.zipcode
+            raw_data['address_street'] = address.street
+            raw_data['address_city'] = address.city
+            raw_data['address_state'] = address.state
+            raw_data['address_zip'] = address.zipcode
         
         # Add flattened coordinates
-        if listing.latLong:
-            raw_data['latitude'] = listing.latLong.latitude
-            raw_data['longitude'] = listing.latLong.longitude
+        if lat_long is not None:
+            raw_data['latitude'] = lat_long.latitude
+            raw_data['longitude'] = lat_long.longitude
         
-        return RawListingRecord(
+        # The listing was validated when the API response was parsed, so the
+        # record is assembled from trusted values without re-validating
+        return RawListingRecord.model_construct(
             source_platform="zillow",
             extraction_timestamp=extraction_timestamp,
             listing_id_native=listing.id,
@@ -210,77 +852,283 @@ class ZillowAgent:
         self,
         location: str,
         max_pages: int = 1,
+        output_file: Optional[str] = None,
         **search_params
     ) -> List[RawListingRecord]:
         """
         Extract listings from Zillow and convert to standardized format.
         
+        A page that fails (after retries) does not abort the extraction:
+        it is logged, recorded in self.page_errors (replaced by each call),
+        and the remaining pages are still returned.
+        
         Args:
             location: Location to search
             max_pages: Maximum number of pages to extract
+            output_file: Optional NDJSON file; each record is written to it
+                as soon as it is converted (same format as save_listings)
             **search_params: Additional search parameters
             
         Returns:
             List of RawListingRecord objects
         """
-        all_listings = []
-        extraction_timestamp = datetime.utcnow()
+        page_errors: List[PageError] = []
+        records = self._iter_listings(location, max_pages, True, page_errors, True, **search_params)
+        if output_file is None:
+            listings = self._run(self._collect(records))
+        else:
+            with open(output_file, 'wb') as f:
+                listings = self._run(self._collect(records, f))
+            print(f"Saved {len(listings)} listings to {output_file}")
         
-        for page in range(1, max_pages + 1):
-            try:
-                # Fetch listings for current page
-                response = self.search_listings(
-                    location=location,
-                    page=page,
-                    **search_params
-                )
+        self.page_errors = sorted(page_errors, key=lambda error: error.page)
+        return listings
+    
+    def extract_many(
+        self,
+        locations: List[str],
+        max_pages: int = 1,
+        **search_params
+    ) -> Dict[str, List[RawListingRecord]]:
+        """
+        Extract listings for several locations concurrently.
+        
+        All locations share the agent's HTTP client, rate limiters and adaptive
+        concurrency limit, so total wall time approaches that of the slowest
+        location rather than the sum, within the RPM budget. Failed pages
+        are recorded in self.page_errors (replaced by each call) with their
+        location.
+        
+        Args:
+            locations: Locations to search
+            max_pages: Maximum number of pages to extract per location
+            **search_params: Additional search parameters, applied to every location
+            
+        Returns:
+            Dict of location -> list of RawListingRecord objects
+        """
+        locations = list(dict.fromkeys(locations))
+        page_errors: List[PageError] = []
+        results = self._run(self._extract_many_async(locations, max_pages, page_errors, **search_params))
+        
+        order = {location: i for i, location in enumerate(locations)}
+        self.page_errors = sorted(page_errors, key=lambda error: (order[error.location], error.page))
+        return dict(zip(locations, results))
+    
+    async def _extract_many_async(
+        self,
+        locations: List[str],
+        max_pages: int,
+        page_errors: List[PageError],
+        **search_params
+    ) -> List[List[RawListingRecord]]:
+        """Async implementation of extract_many."""
+        return await asyncio.gather(*[
+            self._collect(self._iter_listings(location, max_pages, True, page_errors, True, **search_params))
+            for location in locations
+        ])
+    
+    async def _collect(self, records: AsyncIterator[RawListingRecord], output=None) -> List[RawListingRecord]:
+        """Drain an iter_listings stream into a list, optionally writing it as NDJSON."""
+        listings = []
+        async for record in records:
+            listings.append(record)
+            if output is not None:
+                _write_record(output, record)
+        return listings
+    
+    def iter_listings(
+        self,
+        location: str,
+        max_pages: int = 1,
+        ordered: bool = True,
+        **search_params
+    ) -> ListingStream:
+        """
+        Stream listings from Zillow as raw listing records, page by page.
+        
+        Page 1 is fetched first so its totalPages caps how many further
+        pages are requested; those are then fetched concurrently, at most
+        MAX_PAGES_IN_FLIGHT ahead of the consumer. Pages fetched for the
+        stream are not added to the response cache (fresh cached pages are
+        still reused), so memory is bounded by that window rather than by
+        max_pages. Failed pages are logged and recorded in the returned
+        stream's page_errors as they occur.
+        
+        The stream may be consumed on any event loop (e.g. under
+        asyncio.run); the agent's HTTP client follows the running loop.
+        
+        Args:
+            location: Location to search
+            max_pages: Maximum number of pages to extract
+            ordered: Yield pages in page order (True) or as they complete
+            **search_params: Additional search parameters
+            
+        Returns:
+            ListingStream of RawListingRecord objects
+        """
+        page_errors: List[PageError] = []
+        return ListingStream(
+            self._iter_listings(location, max_pages, ordered, page_errors, False, **search_params),
+            page_errors
+        )
+    
+    async def _iter_listings(
+        self,
+        location: str,
+        max_pages: int,
+        ordered: bool,
+        page_errors: List[PageError],
+        cache_pages: bool,
+        **search_params
+    ) -> AsyncIterator[RawListingRecord]:
+        """
+        Async generator behind iter_listings and the extract methods.
+        
+        Failed pages go to page_errors; fetched pages are added to the
+        response cache only if cache_pages is set.
+        """
+        querystrings = [
+            self._build_querystring(location, page=page, **search_params)
+            for page in range(1, max_pages + 1)
+        ]
+        
+        if not querystrings:
+            return
+        # One timezone-aware timestamp for the whole run
+        extraction_timestamp = datetime.now(_UTC)
+        window = ZillowAgentConfig.MAX_PAGES_IN_FLIGHT
+        
+        def fetch(page: int) -> asyncio.Future:
+            return asyncio.ensure_future(self._fetch_page(
+                location, page, querystrings[page - 1], page_errors, cache_pages
+            ))
+        
+        # Without a first response the page count is unknown, so until
+        # then max_pages is the limit
+        last_page = max_pages
+        pending = {1: fetch(1)}
+        next_page = 2
+        try:
+            while pending:
+                if ordered or len(pending) == 1:
+                    task = pending.pop(min(pending))
+                else:
+                    done, _ = await asyncio.wait(
+                        pending.values(), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    task = done.pop()
+                page, response = await task
+                pending.pop(page, None)
+                
+                # Skip failed pages, and pages past a (shorter) totalPages
+                usable = response is not None and page <= last_page
+                if usable:
+                    last_page = min(last_page, max(page, response.totalPages or 1))
+                
+                # Keep the window of requested pages full before yielding
+                while next_page <= last_page and len(pending) < window:
+                    pending[next_page] = fetch(next_page)
+                    next_page += 1
+                
+                if not usable:
+                    continue
                 # Convert to raw listing records
                 for listing in response.results:
-                    raw_record = self.convert_to_raw_listing_record(
+                    yield self.convert_to_raw_listing_record(
                         listing,
                         extraction_timestamp
                     )
-                    all_listings.append(raw_record)
-                
-                # Check if we've reached the last page
-                if page >= (response.totalPages or 1):
-                    break
-                    
-            except Exception as e:
-                print(f"Error extracting page {page}: {e}")
-                # Continue to next page on error
-                continue
+        finally:
+            # Pages still outstanding (past a shorter totalPages, or left
+            # over when the consumer stops early) are not needed; cancel them
+            for task in pending.values():
+                task.cancel()
+            await asyncio.gather(*pending.values(), return_exceptions=True)
+    
+    async def _fetch_page(
+        self,
+        location: str,
+        page: int,
+        querystring: Dict[str, str],
+        page_errors: List[PageError],
+        cache_pages: bool = True
+    ) -> Tuple[int, Optional[ZillowAPIResponse]]:
+        """
+        Fetch one page for iter_listings, recording failures instead of raising.
         
-        return all_listings
+        Args:
+            location: Location being searched
+            page: Page number being fetched
+            querystring: Query parameters from _build_querystring
+            page_errors: The calling stream's list of failed pages
+            cache_pages: Whether to add the fetched page to the response cache
+            
+        Returns:
+            Tuple of (page, response); the response is None if the page failed
+        """
+        try:
+            return page, await self._search_listings_async(querystring, cache_pages)
+        except Exception as e:
+            error = _page_error(page, e, location)
+            page_errors.append(error)
+            if error.kind == 'error':
+                logger.error("Error extracting %s page %d", location, page, exc_info=e)
+            else:
+                logger.warning(
+                    "Error extracting %s page %d (%s): %s", location, page, error.kind, error.detail
+                )
+            return page, None
     
     def save_listings(
         self,
-        listings: List[RawListingRecord],
+        listings: Iterable[RawListingRecord],
         output_file: str
     ) -> None:
         """
-        Save raw listing records to a JSON file.
+        Save raw listing records to an NDJSON file, one record per line.
         
         Args:
-            listings: List of RawListingRecord objects
-            output_file: Path to output JSON file
+            listings: RawListingRecord objects; any iterable, consumed lazily
+            output_file: Path to output NDJSON file
         """
-        import json
+        count = 0
+        with open(output_file, 'wb') as f:
+            for listing in listings:
+                _write_record(f, listing)
+                count += 1
         
-        # Convert to dict format
-        listings_dict = [listing.model_dump() for listing in listings]
+        print(f"Saved {count} listings to {output_file}")
+    
+    def load_listings(self, input_file: str) -> List[RawListingRecord]:
+        """
+        Load raw listing records previously written by save_listings.
         
-        # Serialize datetime objects
-        def datetime_handler(obj):
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+        The records were validated before they were saved, so they are
+        rebuilt without re-validation; only the timestamp is parsed back.
         
-        # Write to file
-        with open(output_file, 'w') as f:
-            json.dump(listings_dict, f, indent=2, default=datetime_handler)
+        Args:
+            input_file: Path to an NDJSON file written by save_listings
+                or extract_listings
+            
+        Returns:
+            List of RawListingRecord objects
+        """
+        listings = []
+        with open(input_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                d = orjson.loads(line)
+                listings.append(RawListingRecord.model_construct(
+                    source_platform=d['source_platform'],
+                    extraction_timestamp=datetime.fromisoformat(d['extraction_timestamp']),
+                    listing_id_native=d['listing_id_native'],
+                    raw_fields=d['raw_fields'],
+                    metadata=d['metadata']
+                ))
         
-        print(f"Saved {len(listings)} listings to {output_file}")
+        return listings
 
 
 if __name__ == "__main__":
@@ -295,15 +1143,14 @@ if __name__ == "__main__":
         max_pages=2,
         min_price=500000,
         max_price=5000000,
-        beds=3  # Multifamily properties typically listed with bedroom counts
+        beds=3,  # Multifamily properties typically listed with bedroom counts
+        output_file="zillow_listings_newark.jsonl"
     )
+    agent.close()
     
     print(f"\nExtracted {len(listings)} listings")
     
-    # Save to file
     if listings:
-        agent.save_listings(listings, "zillow_listings_newark.json")
-        
         # Print first listing as example
         print("\nExample listing:")
         print(f"Property ID: {listings[0].listing_id_native}")